@@ -1,164 +1,85 @@
 import sys
-import re
-import html
+import argparse
 import markdown
 from tqdm import tqdm
 from bs4 import BeautifulSoup
 from database import initialize_staging
 from database import read_stackoverflow_posts, insert_into_stage_posts_cleaned, count_posts, last_post
 from database import read_libraries_projects, insert_into_stage_libraries_cleaned, count_libraries
+from parallel import ordered_pool_map
+from text_cleaner import clean_markdown, extract_libraries_from_code, normalize_library_name
 
-# Function to clean HTML tags
-def clean_html(text):
-    if text:
-        text = html.unescape(text)  # Decode HTML entities
-        text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-        text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-    return text.lower() if text else None
-
-
-# Function to normalize library names
-def normalize_library_name(name):
-    if name:
-        name = name.lower()
-        name = re.sub(r'[^a-z0-9]+', '-', name)  # Replace special chars with '-'
-        name = name.strip('-')
-    return name
-
-# Function to remove @mentions
-def remove_mentions(text):
-    return re.sub(r'@\w+', '', text)
-
-# Function to clean markdown and extract meaningful text
-def clean_markdown(text, preserve_inline_code=True):
+# Function to clean one Stack Overflow post
+def clean_post(post):
     """
-    Cleans Markdown text by:
-    - Removing multi-line code blocks (```code```)
-    - Removing links and images
-    - Optionally keeping or removing inline code (`code`)
-    - Removing all other Markdown formatting
-    :param text: Markdown-formatted text
-    :param preserve_inline_code: If True, keeps text inside single backticks (`example`)
-    :return: Cleaned text without Markdown formatting
+    Cleans one (id, posttypeid, title, body, tags) row from posts_md.
+    :return: Tuple (id, posttypeid, title, body, tags, extracted_libraries) for stage_posts_cleaned
     """
-    if not text:
-        return None
+    post_id, post_type, title, body, tags = post
+    cleaned_body = clean_markdown(body)  # Clean markdown content
+    extracted_libraries = extract_libraries_from_code(body)  # Extract possible libraries
+    processed_tags = tags.strip().lower() if tags else None
 
-    # Remove multi-line code blocks (```code```)
-    text = re.sub(r'```[\s\S]*?```', '', text)
+    return (
+        post_id,
+        post_type,
+        clean_markdown(title),  # Clean title
+        cleaned_body,
+        processed_tags,
+        extracted_libraries  # Extracted libraries from code blocks
+    )
 
-    # Remove links (e.g., [text](http://example.com))
-    text = re.sub(r'\[([^\]]+)\]\((https?:\/\/[^\s]+)\)', r'\1', text)  # Keep link text, remove URL
 
-    # Remove images (e.g., ![alt](image.jpg))
-    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+# Function to clean a batch of Stack Overflow posts (runs in the worker processes)
+def clean_post_batch(batch):
+    return [clean_post(post) for post in batch]
 
-    # Handle inline code (`example`)
-    if preserve_inline_code:
-        text = re.sub(r'`([^`]*)`', r'\1', text)  # Remove backticks but keep text inside
-    else:
-        text = re.sub(r'`([^`]*)`', '', text)  # Remove inline code   
 
-    # Remove remaining Markdown formatting (bold, italic, headers, lists)
-    text = re.sub(r'[#*_>~-]+', '', text)  # Remove #, *, _, >, ~, -, etc.
+# Function to clean one Libraries.io project
+def clean_project(project):
+    id, name, platform, description = project
+    return (
+        id,
+        normalize_library_name(name),  # Normalize library name
+        name,  # Keep the original name
+        platform,
+        clean_markdown(description)  # Clean description text
+    )
 
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    text = remove_mentions(text.lower()) 
 
-    return text
+# Function to clean a batch of Libraries.io projects (runs in the worker processes)
+def clean_project_batch(batch):
+    return [clean_project(project) for project in batch]
 
 
-def extract_libraries_from_code(text):
+# Function to clean batches serially or on a process pool
+def clean_batches(batches, clean_batch, workers=1):
     """
-    Extracts possible library mentions from Markdown code blocks.
-    - Captures library names from import, require, and package manager install commands.
-    - Detect C/C++ headers (#include <sys/socket.h>).
-    :param text: Markdown-formatted body text
-    :return: Comma-separated string of extracted libraries, or None if nothing is found
+    Yields the cleaned version of every batch, in the same order as they were read.
+    :param batches: Iterable of batches read from the database
+    :param clean_batch: Function cleaning one batch
+    :param workers: Number of cleaning processes (1 = clean in this process)
     """
-    if not text:
-        return None
-
-    # List of programming variable names to ignore
-    COMMON_VARIABLES = {"i", "x", "y", "z", "data", "query", "item", "row", "col", "temp", "val"}
-
-    # Dynamically generate regex patterns from package manager commands
-    PACKAGE_MANAGERS = {
-        "PureScript": ["pulp dep install"],
-        "Objective-C": ["pod install", "carthage update"],
-        "C++": ["vcpkg install", "conan install"],
-        "JavaScript": ["npm install", "yarn add", "bower install", "meteor add"],
-        "Java": ["mvn install", "gradle dependencies"],
-        "Python": ["pip install", "conda install"],
-        "C#": ["dotnet add package", "nuget install"],
-        "PHP": ["composer require"],
-        "Ruby": ["gem install", "bundle add"],
-        "Rust": ["cargo install", "cargo add"],
-        "CSS": ["bower install"],
-        "Dart": ["pub add"],
-        "Perl": ["cpan install"],
-        "R": ["install.packages"],
-        "Clojure": ["clojure -Sdeps"],
-        "Elixir": ["mix deps.get"],
-        "C": ["vcpkg install", "conan install"],
-        "Puppet": ["puppet module install"],
-        "Swift": ["swift package add", "pod install", "carthage update"],
-        "Julia": ["Pkg.add"],
-        "Elm": ["elm install"],
-        "D": ["dub add"],
-        "Nim": ["nimble install"],
-        "Haxe": ["haxelib install"],
-        "Go": ["go get"]
-    }
-
-    # Generate install command regex from package managers
-    INSTALL_COMMANDS = [cmd for commands in PACKAGE_MANAGERS.values() for cmd in commands]
-    INSTALL_REGEX = r'\b(?:' + '|'.join(re.escape(cmd) for cmd in INSTALL_COMMANDS) + r')\s+["\']?([a-zA-Z0-9._-]+)["\']?'
-
-    # Stricter regex for standard import statements
-    IMPORT_REGEX = r'^\s*(?:import|require|include|using)\s+["\'<]?([a-zA-Z0-9._-]+)["\'>]?'
-
-    # Improved "from x import y" rule for Python-style imports
-    PYTHON_FROM_IMPORT_REGEX = r'^\s*from\s+([a-zA-Z0-9._-]+)\s+import\s+'
-
-    # Extract content inside inline (`code`) and block (```code```) backticks
-    code_blocks = re.findall(r'`{1,3}(.*?)`{1,3}', text, re.DOTALL)
-
-    libraries = set()
-    for block in code_blocks:
-
-        # Find matches using dynamically generated regex
-        matches = (
-            re.findall(INSTALL_REGEX, block, re.IGNORECASE) +
-            re.findall(IMPORT_REGEX, block, re.IGNORECASE) +
-            re.findall(PYTHON_FROM_IMPORT_REGEX, block, re.IGNORECASE)
-        )
-
-        for match in matches:
-            # Ensure it's not a common variable name
-            if match not in COMMON_VARIABLES:
-                libraries.add(match)
-
-    return ', '.join(libraries) if libraries else None
-
-
+    if workers <= 1:
+        return (clean_batch(batch) for batch in batches)
+    return ordered_pool_map(clean_batch, batches, workers)
 
 
 # Function to clean StackOverflow posts with progress bar
-def clean_stackoverflow_posts(batch_size=10000):
+def clean_stackoverflow_posts(batch_size=10000, workers=1):
     """
     Cleans Stack Overflow posts in batches and stores them in stage_posts_cleaned.
     - Reads posts in paginated batches.
-    - Cleans the markdown content, extracts libraries, and processes tags.
-    - Inserts cleaned data into the staging table.
+    - Cleans the markdown content, extracts libraries, and processes tags
+      (on `workers` processes when workers > 1).
+    - Inserts cleaned data into the staging table, in id order so `last_post()` can resume.
     """
     total_posts = count_posts()
     if total_posts is None:
         print("❌ Error: Could not retrieve post count.")
         return
     
-    print(f"🔄 Processing {total_posts} Stack Overflow posts in batches of {batch_size}...")
+    print(f"🔄 Processing {total_posts} Stack Overflow posts in batches of {batch_size} with {workers} worker(s)...")
 
     start_id = last_post()
 
@@ -166,22 +87,8 @@ def clean_stackoverflow_posts(batch_size=10000):
 
     # Initialize the progress bar
     with tqdm(total=total_posts, desc="Processing Posts", unit="post") as pbar:
-        for batch in read_stackoverflow_posts(batch_size=batch_size, start_id=start_id):
-            cleaned_data = []
-            for post_id, post_type, title, body, tags in batch:
-                cleaned_body = clean_markdown(body)  # Clean markdown content
-                extracted_libraries = extract_libraries_from_code(body)  # Extract possible libraries
-                processed_tags = tags.strip().lower() if tags else None
-                
-                cleaned_data.append((
-                    post_id,
-                    post_type,
-                    clean_markdown(title),  # Clean title
-                    cleaned_body,
-                    processed_tags,
-                    extracted_libraries  # Extracted libraries from code blocks
-                ))
-
+        batches = read_stackoverflow_posts(batch_size=batch_size, start_id=start_id)
+        for cleaned_data in clean_batches(batches, clean_post_batch, workers):
             # Insert cleaned batch into stage_posts_cleaned
             insert_into_stage_posts_cleaned(cleaned_data)
 
@@ -193,11 +100,11 @@ def clean_stackoverflow_posts(batch_size=10000):
 
 
 # Function to clean Libraries.io projects with a progress bar
-def clean_libraries_projects(batch_size=10000):
+def clean_libraries_projects(batch_size=10000, workers=1):
     """
     Cleans Libraries.io projects in batches and stores them in stage_libraries_cleaned.
     - Reads projects in paginated batches.
-    - Normalizes library names and cleans descriptions.
+    - Normalizes library names and cleans descriptions (on `workers` processes when workers > 1).
     - Inserts cleaned data into the staging table.
     """
     total_libraries = count_libraries()
@@ -205,23 +112,14 @@ def clean_libraries_projects(batch_size=10000):
         print("❌ Error: Could not retrieve project count.")
         return
 
-    print(f"🔄 Processing {total_libraries} Libraries.io projects in batches of {batch_size}...")
+    print(f"🔄 Processing {total_libraries} Libraries.io projects in batches of {batch_size} with {workers} worker(s)...")
 
     processed_count = 0
 
     # Initialize the progress bar
     with tqdm(total=total_libraries, desc="Processing Libraries", unit="project") as pbar:
-        for batch in read_libraries_projects(batch_size=batch_size):
-            cleaned_data = []
-            for id, name, platform, description in batch:
-                cleaned_data.append((
-                    id,
-                    normalize_library_name(name),  # Normalize library name
-                    name,  # Keep the original name
-                    platform,
-                    clean_markdown(description)  # Clean description text
-                ))
-
+        batches = read_libraries_projects(batch_size=batch_size)
+        for cleaned_data in clean_batches(batches, clean_project_batch, workers):
             # Insert cleaned batch into stage_libraries_cleaned
             insert_into_stage_libraries_cleaned(cleaned_data)
 
@@ -240,31 +138,32 @@ def main():
         python clean_data.py 1   -> Cleans Stack Overflow posts
         python clean_data.py 2   -> Cleans Libraries.io projects
         python clean_data.py all -> Cleans both datasets
+        python clean_data.py all --workers 8 -> Cleans on 8 processes
     """
-    if len(sys.argv) != 2:
-        print("❌ Invalid usage. Please provide an option: \n"
-              "1 - Clean Stack Overflow posts\n"
-              "2 - Clean Libraries.io projects\n"
-              "all - Clean both datasets")
+    parser = argparse.ArgumentParser(description="Clean Stack Overflow posts and Libraries.io projects.")
+    parser.add_argument("option", choices=["1", "2", "all"],
+                        help="1 - Clean Stack Overflow posts, 2 - Clean Libraries.io projects, all - Clean both datasets")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cleaning processes (default: 1)")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        print("❌ Invalid number of workers. Use 1 or more.")
         sys.exit(1)
-    
+
     initialize_staging()
     
-    option = sys.argv[1].lower()
+    option = args.option.lower()
 
     if option == "1":
         print("🔄 Starting Stack Overflow post cleaning...")
-        clean_stackoverflow_posts(batch_size=5000)
+        clean_stackoverflow_posts(batch_size=5000, workers=args.workers)
     elif option == "2":
         print("🔄 Starting Libraries.io project cleaning...")
-        clean_libraries_projects(batch_size=5000)
+        clean_libraries_projects(batch_size=5000, workers=args.workers)
     elif option == "all":
         print("🔄 Cleaning both datasets...")
-        clean_stackoverflow_posts(batch_size=5000)
-        clean_libraries_projects(batch_size=5000)
-    else:
-        print("❌ Invalid option. Use '1', '2', or 'all'.")
-        sys.exit(1)
+        clean_stackoverflow_posts(batch_size=5000, workers=args.workers)
+        clean_libraries_projects(batch_size=5000, workers=args.workers)
 
 if __name__ == "__main__":
     main()
@@ -1,62 +1,64 @@
 import logging
+import argparse
 from tqdm import tqdm
 import sys
-import nltk
-nltk.download('punkt_tab')
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 from database import (
     initialize_staging,
     insert_into_tokenized_posts,
     last_tokenized_post,
     read_cleaned_posts
 )
-
-# Download required NLTK resources
-nltk.download('punkt')
-nltk.download('stopwords')
+from parallel import ordered_pool_map
+from tokenizer import Tokenizer
 
 # Configure logging
 logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
 
 
-# **Function to Preprocess Text (Title + Body)**
-def preprocess_text(title, body):
-    """
-    Tokenizes and cleans text by:
-    - Lowercasing
-    - Removing non-alphanumeric words
-    - Removing stopwords
-    - Returning space-separated tokens
-    - Combines title + body for better representation
-    """
-    stop_words = set(stopwords.words("english"))
-    combined_text = f"{title} {body}"  # Concatenating title and body
+# Tokenizer of this (worker) process, created once by init_worker()
+worker_tokenizer = None
+
 
-    tokens = word_tokenize(combined_text.lower())  # Tokenize after converting to lowercase
-    tokens = [word for word in tokens if word.isalnum() and word not in stop_words]  # Remove stopwords
+# **Function to Load NLTK Resources Once per Worker Process**
+def init_worker(backend="nltk"):
+    global worker_tokenizer
+    worker_tokenizer = Tokenizer(backend)
 
-    return " ".join(tokens), tokens  # Store as space-separated text and Return both formats  
+
+# **Function to Tokenize a Batch of Cleaned Posts**
+def tokenize_batch(batch):
+    return [
+        (row[0], *worker_tokenizer.preprocess(row[2], row[3]))  # row[2] = title, row[3] = body
+        for row in batch if (row[2] or row[3]) # Ensure title or body exists
+    ]
 
    
-def process_and_store_tokens():
+def process_and_store_tokens(workers=1, backend="nltk"):
+    """
+    Tokenizes cleaned posts and stores them in tokenized_posts.
+    :param workers: Number of tokenizing processes (1 = tokenize in this process).
+                    Batches are stored in id order either way, so `last_tokenized_post()` can resume.
+    :param backend: Tokenizer backend, "nltk" or "regex" (see tokenizer.Tokenizer)
+    """
     last_processed_id = last_tokenized_post()  # Fetch last processed ID from DB
     total_rows = 0  # Keep track of processed rows
 
-    logging.info(f"🚀 Starting tokenization from ID {last_processed_id}...\n")
+    logging.info(f"🚀 Starting tokenization from ID {last_processed_id} with {workers} worker(s) and the {backend} tokenizer...\n")
 
     # Use tqdm for progress bar
     progress_bar = tqdm(desc="Tokenizing", unit=" rows", dynamic_ncols=True)
 
-    for batch in read_cleaned_posts(batch_size=10000, start_id=last_processed_id):
-        processed_data = [
-            (row[0], *preprocess_text(row[2], row[3]))  # row[2] = title, row[3] = body
-            for row in batch if (row[2] or row[3]) # Ensure title or body exists
-        ]
+    batches = read_cleaned_posts(batch_size=10000, start_id=last_processed_id)
+    if workers > 1:
+        processed_batches = ordered_pool_map(tokenize_batch, batches, workers, initializer=init_worker, initargs=(backend,))
+    else:
+        if worker_tokenizer is None or worker_tokenizer.backend != backend:
+            init_worker(backend)
+        processed_batches = (tokenize_batch(batch) for batch in batches)
 
+    for processed_data in processed_batches:
         if not processed_data:
-            logging.info("\n✅ No more rows to process. Tokenization completed.")
-            break
+            continue  # Every post of this batch was empty
 
         insert_into_tokenized_posts(processed_data)  # Insert batch into DB
         last_processed_id = processed_data[-1][0]  # Update last processed ID
@@ -70,5 +72,18 @@ def process_and_store_tokens():
 
 # **Run Tokenization**
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tokenize cleaned Stack Overflow posts.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of tokenizing processes (default: 1)")
+    parser.add_argument("--tokenizer", choices=["nltk", "regex"], default="nltk",
+                        help="nltk = NLTK word_tokenize, regex = faster compiled-regex tokenizer (default: nltk)")
+    args = parser.parse_args()
+
+    # Fail fast if the NLTK data is missing, before any worker starts
+    try:
+        init_worker(args.tokenizer)
+    except LookupError as e:
+        logging.error(e)
+        sys.exit(1)
+
     initialize_staging()  # Ensure DB is ready
-    process_and_store_tokens()  # Start tokenization
+    process_and_store_tokens(workers=max(1, args.workers), backend=args.tokenizer)  # Start tokenization
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import sys
+import logging
+import argparse
+import yaml
+from tqdm import tqdm
+from gensim.models import Word2Vec
+from checkpoint import AsyncCheckpointer
+from parallel import Prefetcher
+from phrases import phrases_path
+from telemetry import Telemetry
+from train_config import load_config, make_corpus, make_phraser, new_model
+from training import prune_vocab, train_streaming
+from vectors import VECTORS_EXTENSION, save_vectors
+
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+# **Function to Train Word2Vec Batch by Batch**
+def train_batches(config):
+    from database import fetch_tokenized_batches, last_processed_token, update_last_processed_id
+
+    model_path, progress = config["model_path"], config["progress"]
+    add_phrases, phraser = make_phraser(config)
+    telemetry = make_telemetry(config)
+    model_version = 0  # Track model versioning
+
+    # The model is saved in the background; the progress only moves once a checkpoint is on disk
+    checkpointer = AsyncCheckpointer(
+        model_path,
+        on_durable=lambda last_id: update_last_processed_id(last_id, progress),
+        every_rows=config["checkpoint_rows"],
+        every_seconds=config["checkpoint_seconds"],
+    )
+
+    # Load Existing Model if Available
+    if os.path.exists(model_path):
+        logging.info("🔄 Loading existing Word2Vec model...")
+        model = Word2Vec.load(model_path)
+        model.workers = config["workers"]
+    else:
+        logging.info("🆕 Creating new Word2Vec model...")
+        model = new_model(config)
+
+        # Build the vocabulary with the first batch
+        initial_batch = next(fetch_tokenized_batches(batch_size=config["batch_size"], start_id=0), None)
+        if initial_batch:
+            sentences, last_processed_id, total_processed = initial_batch
+            sentences = add_phrases(sentences)
+            with telemetry.stage("vocab"):
+                model.build_vocab(sentences)  # Build vocabulary from initial batch
+            logging.info(f"✅ Vocabulary initialized with {len(sentences)} sentences.")
+            with telemetry.stage("checkpoint"):
+                checkpointer.save(model, last_processed_id)
+
+    # **Train in Batches**
+    start_id = last_processed_id = last_processed_token(progress)
+    total_rows = 0
+    rows_since_prune = 0
+    progress_bar = tqdm(desc="Training Word2Vec", unit=" rows", dynamic_ncols=True)
+
+    # The next batches are fetched (and their learned phrases applied) on a background thread while
+    # gensim trains; n-grams stay lazy, materializing them would undo PhraseCorpus
+    # (their generation is then timed as part of the vocab and train stages)
+    def prepare(sentences):
+        with telemetry.stage("phrases"):
+            return list(add_phrases(sentences)) if phraser is not None else add_phrases(sentences)
+
+    batches = telemetry.timed("fetch", fetch_tokenized_batches(config["batch_size"], start_id))
+    if config["prefetch"]:
+        batches = Prefetcher(batches, depth=config["prefetch"],
+                             transform=lambda batch: (prepare(batch[0]), *batch[1:]))
+        batches = telemetry.timed("wait", batches)  # Time the loop actually waited for the prefetched batches
+    else:
+        batches = ((prepare(sentences), *rest) for sentences, *rest in batches)
+
+    for sentences, last_processed_id, total_processed in batches:
+        if len(sentences) > 0:
+
+            if config["alpha"] == "carry":
+                # Restore alpha after the vocabulary update to prevent the
+                # "Effective 'alpha' higher than previous training cycles" warning, then decay it per epoch
+                prev_alpha, prev_min_alpha = model.alpha, model.min_alpha
+                with telemetry.stage("vocab"):
+                    model.build_vocab(sentences, update=True)
+                model.alpha, model.min_alpha = prev_alpha, prev_min_alpha
+
+                alpha_step = (model.alpha - model.min_alpha) / config["epochs"]
+                for epoch in range(config["epochs"]):
+                    current_alpha = max(model.min_alpha, model.alpha - epoch * alpha_step)
+                    with telemetry.stage("train"):
+                        result = model.train(sentences, total_examples=len(sentences), epochs=1,
+                                             start_alpha=current_alpha, end_alpha=model.min_alpha)
+                    telemetry.count_training(result)
+            else:
+                with telemetry.stage("vocab"):
+                    model.build_vocab(sentences, update=True)  # Update the vocabulary
+                with telemetry.stage("train"):
+                    result = model.train(sentences, total_examples=len(sentences), epochs=config["epochs"])
+                telemetry.count_training(result)
+            telemetry.count(rows=len(sentences), batches=1)
+
+            # Keep the vocabulary bounded, before the checkpoints and versions are written
+            rows_since_prune += len(sentences)
+            if config["prune_every_rows"] and rows_since_prune >= config["prune_every_rows"]:
+                with telemetry.stage("prune"):
+                    prune_vocab(model, max_vocab_size=config["prune_max_vocab_size"], min_count=config["prune_min_count"],
+                                ngram_min_count=config["prune_ngram_min_count"])
+                rows_since_prune = 0
+
+            # Checkpoint the model (in the background) & update progress in DB once it is written
+            with telemetry.stage("checkpoint"):
+                checkpointer.maybe_save(model, last_processed_id, rows=len(sentences))
+
+            # Update progress bar
+            progress_bar.update(total_processed - total_rows)
+            total_rows = total_processed
+            new_version = last_processed_id // config["version_every"]
+            if new_version > model_version:
+                model_version = new_version
+                version_path = os.path.join(
+                    config["versions_dir"],
+                    os.path.splitext(model_path)[0] + f"{config['version_suffix']}{model_version}{VECTORS_EXTENSION}",
+                )
+                # Versions only keep the vectors; the full model is only needed by the resumable checkpoint
+                with telemetry.stage("version"):
+                    save_vectors(model.wv, version_path, float16=config["version_float16"])
+                    if phraser is not None:
+                        phraser.save(phrases_path(version_path))  # Keep the detector next to every version
+
+            telemetry.maybe_emit(last_id=last_processed_id, vocab_size=len(model.wv))
+
+    if total_rows:
+        with telemetry.stage("checkpoint"):
+            checkpointer.flush(model, last_processed_id)
+    progress_bar.close()
+    telemetry.emit("done", last_id=last_processed_id, vocab_size=len(model.wv))
+    logging.info("🎉 Training complete! Final model saved.")
+
+
+# **Function to Train Word2Vec in Whole Epochs over the Streamed Corpus**
+def train_epochs(config):
+    model = new_model(config)
+    add_phrases, _ = make_phraser(config)
+    corpus = add_phrases(make_corpus(config))
+    train_streaming(model, corpus, config["model_path"], config["epochs"],
+                    count_workers=config["count_workers"], max_vocab_size=config["max_vocab_size"],
+                    queue_factor=config["queue_factor"], telemetry=make_telemetry(config))
+
+
+# **Function to Create the Training Telemetry of the Configuration**
+def make_telemetry(config):
+    return Telemetry(config["model_path"], json_path=config["telemetry_file"],
+                     prometheus_path=config["prometheus_file"], every_seconds=config["telemetry_seconds"])
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Train Word2Vec from a YAML config (see configs/).")
+    parser.add_argument("--config", type=str, default=None, help="YAML config file, e.g. configs/7g_v2_word2vec.yaml")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config value, e.g. --set vector_size=300 (repeatable)")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.overrides)
+    except ValueError as e:
+        print(e, flush=True)
+        sys.exit(1)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"❌ Could not read the config: {e}", flush=True)
+        sys.exit(1)
+
+    logging.info(f"⚙️ Config: {config}")
+
+    if config["source"] == "postgres":
+        from database import initialize_staging
+        initialize_staging()
+
+    if config["mode"] == "sharded":
+        print("❌ The sharded mode runs in steps, use 12_sharded_word2vec.py.", flush=True)
+        sys.exit(1)
+    if config["mode"] == "streaming":
+        train_epochs(config)
+    else:
+        train_batches(config)
+
+
+if __name__ == "__main__":
+    main()
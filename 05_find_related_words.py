@@ -2,7 +2,9 @@ import os
 import argparse
 from dotenv import load_dotenv
 import psycopg2
-from gensim.models import Word2Vec
+from phrases import load_phraser
+from ann import NPROBE, load_or_build_ann
+from vectors import SimilarityIndex, find_snapshot, load_vectors
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,13 +19,39 @@ DB_PORT = os.getenv("DB_PORT")
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description="Update quality attributes with related words using Word2Vec.")
 parser.add_argument("--version", type=int, default=32, help="Version number to use in model filename (default: 32)")
+parser.add_argument("--model", type=str, default=None, help="Word2Vec snapshot (.kv) or model path, overrides --version")
+parser.add_argument("--ann", action="store_true", help="Use the approximate nearest-neighbour index stored next to the model (built the first time)")
+parser.add_argument("--nprobe", type=int, default=NPROBE, help=f"Clusters scanned per query with --ann (default: {NPROBE})")
 
 args = parser.parse_args()
 model_version = f"_MV{args.version}" if args.version else ""
 
-# Load the custom-trained Word2Vec model using the provided version
-model_filename = f"./versions/stackoverflow_7g_v2_word2vec{model_version}.model" if args.version else "stackoverflow_7g_v2_word2vec.model"
-model = Word2Vec.load(model_filename, mmap="r")
+# Load the vectors of the custom-trained Word2Vec model using the provided version (.kv snapshot, else the full .model)
+model_base = f"./versions/stackoverflow_7g_v2_word2vec{model_version}" if args.version else "stackoverflow_7g_v2_word2vec"
+model_filename = args.model or find_snapshot(model_base) or model_base + ".model"
+wv = load_vectors(model_filename)
+# Normalizes the vectors once, queried a batch of attributes at a time (exactly, or through the ANN index)
+similarity_index = load_or_build_ann(wv, model_filename, args.nprobe) if args.ann else SimilarityIndex(wv)
+
+# Phrase detector of models trained with --phrases learned (stored next to the model)
+phraser = load_phraser(model_filename)
+if phraser:
+    print(f"✅ Loaded the phrase detector of {model_filename}", flush=True)
+
+
+# **Function to Map an Attribute to the Vocabulary Terms to Query**
+def attribute_terms(attribute):
+    """
+    :return: The attribute as one n-gram if the model knows it, else the words and phrases
+             the phrase detector finds in it that the model knows (empty if none)
+    """
+    attribute_ngram = attribute.replace(" ", "_")  # Replace spaces with underscores
+    if attribute_ngram in wv:
+        return [attribute_ngram]
+    if phraser is None:
+        return []
+    return [term for term in phraser[attribute.lower().split()] if term in wv]
+
 
 # Connect to the PostgreSQL database
 try:
@@ -53,29 +81,30 @@ while True:
     if not attributes:
         break  # Exit loop when there are no more attributes to fetch
 
-    # Process each attribute and find related words
-    for (attribute,) in attributes:
-        attribute_ngram = attribute.replace(" ", "_")  # Replace spaces with underscores
-
-        if attribute_ngram in model.wv:
-            # Find similar words with similarity > 0.7
-            similar_words = model.wv.most_similar(attribute_ngram, topn=50)
-            filtered_words = sorted(
-                [word.replace("_", " ") for word, similarity in similar_words if similarity >= 0.7],
-                key=lambda word: next(similarity for w, similarity in similar_words if w == word.replace(" ", "_")),
-                reverse=True
-            )
-
-
-            # Update the related_words column in the database
-            cursor.execute(
-                "UPDATE quality_attributes SET related_words = %s WHERE attribute = %s;",
-                (filtered_words, attribute)
-            )
-            
-            print(f"🔹 {num}. Quality Criterion: {attribute} → {attribute_ngram}", flush=True)
-            print(f"   Related Words: {', '.join(filtered_words)}", flush=True)
-            num += 1
+    # Find the related words of all the attributes of the batch at once
+    attribute_terms_list = [(attribute, attribute_terms(attribute)) for (attribute,) in attributes]
+    attribute_terms_list = [(attribute, terms) for attribute, terms in attribute_terms_list if terms]
+    neighbours = similarity_index.most_similar([terms for _, terms in attribute_terms_list], topn=50)
+
+    # Process each attribute and its related words
+    for (attribute, terms), similar_words in zip(attribute_terms_list, neighbours):
+        # Keep similar words with similarity > 0.7
+        filtered_words = sorted(
+            [word.replace("_", " ") for word, similarity in similar_words if similarity >= 0.7],
+            key=lambda word: next(similarity for w, similarity in similar_words if w == word.replace(" ", "_")),
+            reverse=True
+        )
+
+
+        # Update the related_words column in the database
+        cursor.execute(
+            "UPDATE quality_attributes SET related_words = %s WHERE attribute = %s;",
+            (filtered_words, attribute)
+        )
+        
+        print(f"🔹 {num}. Quality Criterion: {attribute} → {' + '.join(terms)}", flush=True)
+        print(f"   Related Words: {', '.join(filtered_words)}", flush=True)
+        num += 1
 
     # Move to the next batch
     offset += BATCH_SIZE
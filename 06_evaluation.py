@@ -1,9 +1,12 @@
 import os
 import argparse
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-from gensim.models import Word2Vec
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from embedding_cache import EmbeddingCache
+from ann import NPROBE, load_or_build_ann
+from vectors import SimilarityIndex, list_snapshots, load_vectors
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,6 +24,8 @@ MODELS_PATH = os.getenv("MODELS_PATH", "").strip()
 # Parse command-line arguments
 parser = argparse.ArgumentParser(description="Compute similarity scores using Word2Vec and BERT.")
 parser.add_argument("--models_path", type=str, default="./versions/", help="Path to the directory containing models.")
+parser.add_argument("--ann", action="store_true", help="Use the approximate nearest-neighbour index stored next to every model (built the first time).")
+parser.add_argument("--nprobe", type=int, default=NPROBE, help=f"Clusters scanned per query with --ann (default: {NPROBE}).")
 args = parser.parse_args()
 
 # If MODELS_PATH is empty, use the command-line argument
@@ -29,9 +34,15 @@ if not MODELS_PATH:
 
 BATCH_SIZE = 1000  # Database query batch size
 TOP_N = 200  # Number of top similar words to retrieve
+BERT_MODEL_NAME = "microsoft/codebert-base"
+ENCODE_BATCH_SIZE = 64  # Texts per forward pass of the BERT model
 
-# Load BERT model once
-bert_model = SentenceTransformer("microsoft/codebert-base")
+# Load BERT model once; embeddings are cached on disk across models and runs (see embedding_cache.py)
+bert_model = SentenceTransformer(BERT_MODEL_NAME)
+embedding_cache = EmbeddingCache(
+    BERT_MODEL_NAME,
+    lambda texts: bert_model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True),
+)
 
 # Connect to the PostgreSQL database
 try:
@@ -68,29 +79,30 @@ except Exception as e:
     print(f"❌ Error connecting to the database: {e}", flush=True)
     exit()
 
-# Get all available Word2Vec models in the directory
-model_files = [fname for fname in os.listdir(MODELS_PATH) if fname.endswith(".model")]
+# Get all available Word2Vec snapshots (.kv, or full .model) in the directory
+snapshots = list_snapshots(MODELS_PATH)
 
 # Remove already processed models
-model_files = [fname for fname in model_files if fname.replace(".model", "") not in processed_models]
+model_names = sorted(name for name in snapshots if name not in processed_models)
 
-if not model_files:
+if not model_names:
     print("✅ All models are already processed. Exiting...", flush=True)
     cursor.close()
     conn.close()
     exit()
 
-print(f"✅ Found {len(model_files)} new Word2Vec models. Processing one at a time.", flush=True)
+print(f"✅ Found {len(model_names)} new Word2Vec models. Processing one at a time.", flush=True)
 
 # Process each model separately
-for model_file in model_files:
-    model_path = os.path.join(MODELS_PATH, model_file)
-    model_name = model_file.replace(".model", "")
+for model_name in model_names:
+    model_path = snapshots[model_name]
 
     print(f"📥 Loading model: {model_name}", flush=True)
     
     try:
-        model = Word2Vec.load(model_path, mmap="r")
+        wv = load_vectors(model_path)
+        # Normalizes the vectors once per model (exact search, or the ANN index)
+        similarity_index = load_or_build_ann(wv, model_path, args.nprobe) if args.ann else SimilarityIndex(wv)
     except Exception as e:
         print(f"❌ Error loading model {model_name}: {e}", flush=True)
         continue  # Skip model if it fails to load
@@ -107,25 +119,27 @@ for model_file in model_files:
         if not attributes:
             break  # Exit loop when no more attributes
 
-        for (attribute,) in attributes:
-            attribute_ngram = attribute.replace(" ", "_")  # Adjust for Word2Vec token format
+        attribute_ngrams = {attribute: attribute.replace(" ", "_") for (attribute,) in attributes}  # Adjust for Word2Vec token format
+        known_attributes = [attribute for attribute, ngram in attribute_ngrams.items() if ngram in wv]
 
-            if attribute_ngram in model.wv:
-                # Get top N similar words using Word2Vec
-                similar_words = model.wv.most_similar(attribute_ngram, topn=TOP_N)
+        # Get top N similar words of all the attributes of the batch at once using Word2Vec
+        neighbours = similarity_index.most_similar([attribute_ngrams[attribute] for attribute in known_attributes], topn=TOP_N)
 
-                for word, w2v_score in similar_words:
-                    word_clean = word.replace("_", " ")  # Restore spaces for better readability
+        for attribute, similar_words in zip(known_attributes, neighbours):
+            words_clean = [word.replace("_", " ") for word, _ in similar_words]  # Restore spaces for better readability
 
-                    # Compute BERT similarity score
-                    bert_score = util.cos_sim(bert_model.encode(attribute), bert_model.encode(word_clean)).item()
+            # Compute the BERT similarity scores of all candidates at once (attribute and words encoded in one batch)
+            bert_scores = embedding_cache.similarities(attribute, words_clean)
 
-                    # Insert or update the similarity table
-                    cursor.execute("""
-                        INSERT INTO similarity_results (model_name, criteria, similar_word, w2v_similarity_score, bert_ms_similarity_score)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (model_name, criteria, similar_word) DO NOTHING;
-                    """, (model_name, attribute, word_clean, w2v_score, bert_score))
+            # Insert the similarity rows of the attribute in one statement
+            execute_values(cursor, """
+                INSERT INTO similarity_results (model_name, criteria, similar_word, w2v_similarity_score, bert_ms_similarity_score)
+                VALUES %s
+                ON CONFLICT (model_name, criteria, similar_word) DO NOTHING;
+            """, [
+                (model_name, attribute, word_clean, w2v_score, bert_score)
+                for word_clean, (_, w2v_score), bert_score in zip(words_clean, similar_words, bert_scores)
+            ])
 
         # Move to next batch
         offset += BATCH_SIZE
@@ -133,9 +147,11 @@ for model_file in model_files:
     # commit at the end of the processing of a model.      
     conn.commit()
 
+    embedding_cache.log_stats()
     print(f"✅ Finished processing {model_name}. Moving to the next model...\n", flush=True)
 
 # Close database connection
 cursor.close()
 conn.close()
+embedding_cache.close()
 print("✅ All similarity scores updated successfully.", flush=True)
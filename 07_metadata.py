@@ -1,12 +1,12 @@
 import os
 import argparse
-import gensim
 import re
+from vectors import list_snapshots, load_vectors
 
 def load_word2vec_model(model_path):
-    """Loads a Word2Vec model from the given path."""
+    """Loads the vectors of a Word2Vec snapshot (.kv) or model from the given path."""
     try:
-        model = gensim.models.Word2Vec.load(model_path)
+        model = load_vectors(model_path)
         return model
     except Exception as e:
         print(f"Error loading model {model_path}: {e}")
@@ -34,14 +34,13 @@ if __name__ == "__main__":
     
     model_data = []
     
-    for root, _, files in os.walk(model_folder):
-        for file in files:
-            if file.endswith(".model"):
-                model_path = os.path.join(root, file)
-                model = load_word2vec_model(model_path)
-                
-                if model:
-                    model_data.append(get_model_metadata(model, file))
+    for root, _, _ in os.walk(model_folder):
+        # One entry per snapshot, the .kv memmap preferred when the full .model exists too
+        for model_path in list_snapshots(root).values():
+            model = load_word2vec_model(model_path)
+            
+            if model:
+                model_data.append(get_model_metadata(model, os.path.basename(model_path)))
     
     # Sort by natural order
     model_data.sort(key=lambda x: natural_sort_key(x.split(',')[0]))
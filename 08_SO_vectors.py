@@ -1,9 +1,13 @@
 import os
 import argparse
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from gensim.models import KeyedVectors
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from embedding_cache import EmbeddingCache
+from ann import NPROBE, load_or_build_ann
+from vectors import SimilarityIndex
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,11 +19,23 @@ DB_NAME = os.getenv("DBC_NAME")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT")
 
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Compute similarity scores using the pre-trained SO Word2Vec vectors and BERT.")
+parser.add_argument("--ann", action="store_true", help="Use the approximate nearest-neighbour index stored next to the vectors (built the first time).")
+parser.add_argument("--nprobe", type=int, default=NPROBE, help=f"Clusters scanned per query with --ann (default: {NPROBE}).")
+args = parser.parse_args()
+
 BATCH_SIZE = 1000  # Database query batch size
 TOP_N = 200  # Number of top similar words to retrieve
+BERT_MODEL_NAME = "microsoft/codebert-base"
+ENCODE_BATCH_SIZE = 64  # Texts per forward pass of the BERT model
 
-# Load BERT model once
-bert_model = SentenceTransformer("microsoft/codebert-base")
+# Load BERT model once; embeddings are cached on disk across models and runs (see embedding_cache.py)
+bert_model = SentenceTransformer(BERT_MODEL_NAME)
+embedding_cache = EmbeddingCache(
+    BERT_MODEL_NAME,
+    lambda texts: bert_model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True),
+)
 
 # Connect to the PostgreSQL database
 try:
@@ -58,6 +74,8 @@ w2v_model_path = "./models_ref/SO_vectors_200.bin"
 try:
     print(f"📥 Loading Word2Vec model from {w2v_model_path}", flush=True)
     word2vec = KeyedVectors.load_word2vec_format(w2v_model_path, binary=True)
+    # Normalizes the vectors once (exact search, or the ANN index)
+    similarity_index = load_or_build_ann(word2vec, w2v_model_path, args.nprobe) if args.ann else SimilarityIndex(word2vec)
     print("✅ Successfully loaded Word2Vec model.", flush=True)
 except Exception as e:
     print(f"❌ Error loading Word2Vec model: {e}", flush=True)
@@ -75,25 +93,27 @@ while True:
     if not attributes:
         break  # Exit loop when no more attributes
 
-    for (attribute,) in attributes:
-        attribute_ngram = attribute.replace(" ", "_")  # Adjust for Word2Vec token format
+    attribute_ngrams = {attribute: attribute.replace(" ", "_") for (attribute,) in attributes}  # Adjust for Word2Vec token format
+    known_attributes = [attribute for attribute, ngram in attribute_ngrams.items() if ngram in word2vec]
 
-        if attribute_ngram in word2vec:
-            # Get top N similar words using Word2Vec
-            similar_words = word2vec.most_similar(attribute_ngram, topn=TOP_N)
+    # Get top N similar words of all the attributes of the batch at once using Word2Vec
+    neighbours = similarity_index.most_similar([attribute_ngrams[attribute] for attribute in known_attributes], topn=TOP_N)
 
-            for word, w2v_score in similar_words:
-                word_clean = word.replace("_", " ")  # Restore spaces for better readability
+    for attribute, similar_words in zip(known_attributes, neighbours):
+        words_clean = [word.replace("_", " ") for word, _ in similar_words]  # Restore spaces for better readability
 
-                # Compute BERT similarity score
-                bert_score = util.cos_sim(bert_model.encode(attribute), bert_model.encode(word_clean)).item()
+        # Compute the BERT similarity scores of all candidates at once (attribute and words encoded in one batch)
+        bert_scores = embedding_cache.similarities(attribute, words_clean)
 
-                # Insert or update the similarity table
-                cursor.execute("""
-                    INSERT INTO similarity_results (model_name, criteria, similar_word, w2v_similarity_score, bert_ms_similarity_score)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (model_name, criteria, similar_word) DO NOTHING;
-                """, (model_name, attribute, word_clean, w2v_score, bert_score))
+        # Insert the similarity rows of the attribute in one statement
+        execute_values(cursor, """
+            INSERT INTO similarity_results (model_name, criteria, similar_word, w2v_similarity_score, bert_ms_similarity_score)
+            VALUES %s
+            ON CONFLICT (model_name, criteria, similar_word) DO NOTHING;
+        """, [
+            (model_name, attribute, word_clean, w2v_score, bert_score)
+            for word_clean, (_, w2v_score), bert_score in zip(words_clean, similar_words, bert_scores)
+        ])
 
     # Move to next batch
     offset += BATCH_SIZE
@@ -101,8 +121,10 @@ while True:
     # Commit after processing a batch
     conn.commit()
 
+embedding_cache.log_stats()
 print("✅ All similarity scores updated successfully.", flush=True)
 
 # Close database connection
 cursor.close()
 conn.close()
+embedding_cache.close()
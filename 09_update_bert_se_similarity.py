@@ -1,9 +1,10 @@
 import os
 import psycopg2
-import tensorflow as tf
 import numpy as np
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from transformers import TFBertModel, BertTokenizer
+from embedding_cache import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_TASK_DIR, EmbeddingCache, task_cache_path
 
 # Load environment variables
 load_dotenv()
@@ -15,7 +16,9 @@ DB_NAME = os.getenv("DBC_NAME")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT")
 
-BATCH_SIZE = 100  # Adjust batch size for efficiency
+BATCH_SIZE = 1000  # similarity_results rows scored per database batch
+ENCODE_BATCH_SIZE = 32  # Texts per forward pass of BERT_SE
+MAX_LENGTH = 512  # Tokens per text, longer texts are truncated
 
 # Load BERT_SE model
 BERT_SE_PATH = "./BERT_SE_hf"
@@ -29,23 +32,54 @@ except Exception as e:
     print(f"❌ Error loading BERT_SE model: {e}", flush=True)
     exit()
 
-# Function to compute similarity using BERT_SE
-def compute_similarity(text1, text2):
-    inputs_1 = tokenizer(text1, return_tensors="tf", padding=True, truncation=True, max_length=512)
-    inputs_2 = tokenizer(text2, return_tensors="tf", padding=True, truncation=True, max_length=512)
-
-    # Get embeddings
-    embeddings_1 = bert_se_model(**inputs_1).last_hidden_state[:, 0, :]
-    embeddings_2 = bert_se_model(**inputs_2).last_hidden_state[:, 0, :]
-
-    # 🔹 Fix: Normalize embeddings
-    embeddings_1 = tf.linalg.l2_normalize(embeddings_1, axis=-1)
-    embeddings_2 = tf.linalg.l2_normalize(embeddings_2, axis=-1)
-
-    # 🔹 Fix: Compute cosine similarity correctly
-    similarity = tf.reduce_sum(embeddings_1 * embeddings_2, axis=-1).numpy().item()
-    
-    return similarity
+# **Function to Encode Texts into BERT_SE [CLS] Embeddings**
+def encode_texts(texts):
+    """
+    Runs the texts through BERT_SE in mini-batches of similar length, each padded only to its own
+    longest text (dynamic padding), so short terms are not padded to the length of long ones.
+    :return: float32 array (len(texts) x hidden size), in the order of `texts`
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    embeddings = np.empty((len(texts), bert_se_model.config.hidden_size), dtype=np.float32)
+    for start in range(0, len(order), ENCODE_BATCH_SIZE):
+        batch = order[start:start + ENCODE_BATCH_SIZE]
+        inputs = tokenizer([texts[i] for i in batch], return_tensors="tf", padding="longest",
+                           truncation=True, max_length=MAX_LENGTH)
+        embeddings[batch] = bert_se_model(**inputs, training=False).last_hidden_state[:, 0, :].numpy()
+    return embeddings
+
+
+# Embeddings are cached on disk, every criterion is scored against hundreds of words (see embedding_cache.py).
+# With EMBEDDING_CACHE_TASK_DIR set (parallel SLURM tasks), every task writes its own cache file there and
+# only reads the shared one, since SQLite locking is unreliable on the shared file system; the job merges
+# the task files into the shared cache once all the tasks are done (see run_bert_se_job.slurm).
+task = os.getenv("SLURM_PROCID", "0")
+embedding_cache = EmbeddingCache(
+    f"BERT_SE:{os.path.abspath(BERT_SE_PATH)}", encode_texts,
+    path=task_cache_path(task) if EMBEDDING_CACHE_TASK_DIR else EMBEDDING_CACHE_PATH,
+    base_path=EMBEDDING_CACHE_PATH if EMBEDDING_CACHE_TASK_DIR else None,
+)
+
+
+# **Function to Compute the BERT_SE Similarity of a Batch of (criteria, similar_word) Pairs**
+def compute_similarities(pairs):
+    """
+    Encodes the distinct texts of all the pairs once and computes every cosine similarity
+    from one product of the normalized criteria and word embeddings.
+    :param pairs: List of (criteria, similar_word)
+    :return: List of similarities, in the order of `pairs`
+    """
+    criteria = sorted({criterion for criterion, _ in pairs})
+    words = sorted({word for _, word in pairs})
+
+    embeddings = embedding_cache.encode(criteria + words).astype(np.float64)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings /= np.where(norms == 0, 1.0, norms)
+
+    similarities = embeddings[:len(criteria)] @ embeddings[len(criteria):].T
+    criteria_index = {criterion: i for i, criterion in enumerate(criteria)}
+    words_index = {word: i for i, word in enumerate(words)}
+    return [similarities[criteria_index[criterion], words_index[word]].item() for criterion, word in pairs]
 
 # Connect to PostgreSQL database
 try:
@@ -64,49 +98,71 @@ except Exception as e:
     print(f"❌ Error connecting to the database: {e}", flush=True)
     exit()
 
-# Process records where bert_se_similarity_score is NULL
-offset = 0
+# Partial index of the rows still to score, so claiming a batch does not scan the scored ones
+try:
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS similarity_results_bert_se_todo_idx
+        ON similarity_results (model_name, criteria, similar_word)
+        WHERE bert_se_similarity_score IS NULL;
+    """)
+    conn.commit()
+except psycopg2.Error as e:  # Another task created it at the same time
+    print(f"⚠️ Could not create the index of unscored rows: {e}", flush=True)
+    conn.rollback()
+
+# Process records where bert_se_similarity_score is NULL as a work queue: every batch is claimed with
+# FOR UPDATE SKIP LOCKED, so several SLURM tasks (srun) never score the same rows, and the locks are
+# released by the commit that stores the scores. The keyset (last claimed key) only moves forward, so
+# rows of a failed batch stay NULL for the next run instead of being retried forever.
+last_key = None
+scored = 0
 
 while True:
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT model_name, criteria, similar_word 
-        FROM similarity_results 
-        WHERE bert_se_similarity_score IS NULL
+    after_last_key = "AND (model_name, criteria, similar_word) > (%s, %s, %s)" if last_key else ""
+    cursor.execute(f"""
+        SELECT model_name, criteria, similar_word
+        FROM similarity_results
+        WHERE bert_se_similarity_score IS NULL {after_last_key}
         ORDER BY model_name, criteria, similar_word
-        LIMIT %s OFFSET %s;
-    """, (BATCH_SIZE, offset))
-    
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED;
+    """, (*(last_key or ()), BATCH_SIZE))
+
     rows = cursor.fetchall()
 
     if not rows:
+        conn.commit()
         break  # Exit loop if no more rows to process
 
-    print(f"📥 Processing {len(rows)} rows...", flush=True)
+    last_key = rows[-1]
+    print(f"📥 Task {task}: processing {len(rows)} rows up to {last_key}...", flush=True)
 
-    for model_name, criteria, similar_word in rows:
-        try:
-            # Compute similarity using BERT_SE
-            bert_se_score = compute_similarity(criteria, similar_word)
+    try:
+        # Compute the similarities of the whole batch using BERT_SE
+        scores = compute_similarities([(criteria, similar_word) for _, criteria, similar_word in rows])
 
-            cursor.execute("""
-                UPDATE similarity_results 
-                SET bert_se_similarity_score = %s 
-                WHERE criteria = %s AND similar_word = %s;
-            """, (bert_se_score, criteria, similar_word))
-        
-        except Exception as e:
-            print(f"❌ Error processing ({criteria}, {similar_word}): {e}", flush=True)
-            continue
+        # Write them back by primary key with one UPDATE for the batch
+        execute_values(cursor, """
+            UPDATE similarity_results AS s
+            SET bert_se_similarity_score = v.score
+            FROM (VALUES %s) AS v(model_name, criteria, similar_word, score)
+            WHERE s.model_name = v.model_name AND s.criteria = v.criteria AND s.similar_word = v.similar_word;
+        """, [(*row, score) for row, score in zip(rows, scores)],
+            template="(%s, %s, %s, %s::float)", page_size=len(rows))
 
-    # Move to next batch
-    offset += BATCH_SIZE
+        # Commit after processing a batch (releases the claimed rows)
+        conn.commit()
+        scored += len(rows)
 
-    # Commit after processing a batch
-    conn.commit()
+    except Exception as e:
+        print(f"❌ Error processing the batch up to {last_key}: {e}", flush=True)
+        conn.rollback()
 
+print(f"✅ Task {task}: scored {scored} rows.", flush=True)
+embedding_cache.log_stats()
 print("✅ bert_se_similarity_score updated successfully.", flush=True)
 
 # Close database connection
 cursor.close()
 conn.close()
+embedding_cache.close()
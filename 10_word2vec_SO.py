@@ -1,44 +1,31 @@
 import os
 import time
+import argparse
 from gensim.models import Word2Vec
+from corpus import load_sentences
+from parallel import available_cpus
+from training import train_streaming
 
 SENTENCE_FILE_PATH = "./sentences/processed_sentences.txt"
+SENTENCE_DIR_PATH = "./sentences"  # Shards written by 11_export_sentences.py
+MODEL_PATH = "MDL_SO.model"  # Full model, with the per-epoch checkpoints and resume state next to it
 
 
-class SentenceIterator:
-    def __init__(self, filepath):
-        self.filepath = filepath
-
-    def __iter__(self):
-        with open(self.filepath, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    yield line.split()  # Already tokenized, lowercased, and cleaned
-
-
-def train_word2vec_from_file(filepath):
+def train_word2vec_from_file(path, epochs=3, workers=4):
     print("✨ Initializing Word2Vec training from file...", flush=True)
     start = time.time()
 
-    sentences = SentenceIterator(filepath)
+    sentences = load_sentences(path, default_file=os.path.basename(SENTENCE_FILE_PATH))
 
     model = Word2Vec(
         vector_size=200,
         window=5,
         min_count=5,
-        workers=4,
+        workers=workers,
     )
 
-    print("🔎 Building vocabulary...", flush=True)
-    model.build_vocab(sentences)
-
-    print("🚂 Training model...", flush=True)
-    model.train(
-        sentences,
-        total_examples=model.corpus_count,
-        epochs=3,
-    )
+    # One (sharded) vocabulary scan, then one checkpointed pass per epoch; resumes an interrupted run
+    model = train_streaming(model, sentences, MODEL_PATH, epochs, count_workers=workers)
 
     end = time.time()
     print(f"🎉 Training complete in {(end - start) / 60:.2f} minutes.", flush=True)
@@ -53,8 +40,16 @@ def save_model(model):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Train Word2Vec from disk-backed sentences.")
+    parser.add_argument("--sentences", type=str, default=SENTENCE_DIR_PATH,
+                        help="Sharded sentence directory or single sentence file (default: ./sentences)")
+    parser.add_argument("--epochs", type=int, default=3, help="Number of training epochs (default: 3)")
+    parser.add_argument("--workers", type=int, default=available_cpus(),
+                        help="Training threads and vocabulary counting processes (default: available CPUs)")
+    args = parser.parse_args()
+
     print("🚀 Starting Word2Vec training from disk-backed sentences...", flush=True)
-    model = train_word2vec_from_file(SENTENCE_FILE_PATH)
+    model = train_word2vec_from_file(args.sentences, epochs=args.epochs, workers=max(1, args.workers))
     save_model(model)
 
 
@@ -0,0 +1,106 @@
+import os
+import sys
+import math
+import logging
+import argparse
+from tqdm import tqdm
+from database import stream_tokenized_posts, count_tokenized_posts
+from corpus import SHARD_EXTENSIONS, open_shard, read_manifest, write_manifest
+
+# Configure logging
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+
+# **Function to Export Tokenized Posts to Sharded Sentence Files**
+def export_sentences(output_dir, num_shards=8, compression="none", itersize=10000):
+    """
+    Streams tokenized_posts into `num_shards` line files (one tokenized post per line) in `output_dir`,
+    with a manifest.json recording the post_id range of every shard.
+    Runs are incremental: only posts newer than the manifest's last_id are exported, into new shards.
+    Every shard is written to a temp file, renamed when complete, and only then added to the manifest,
+    so an interrupted export simply resumes after the last complete shard.
+    :param output_dir: Directory for the shards and the manifest
+    :param num_shards: Number of shards to split the new posts into
+    :param compression: "none", "gzip" or "zstd"
+    :param itersize: Rows fetched from the server-side cursor at a time
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    start_id = manifest["last_id"]
+
+    total_posts = count_tokenized_posts(start_id)
+    if total_posts is None:
+        logging.error("❌ Error: Could not count the tokenized posts.")
+        return False
+    if total_posts == 0:
+        logging.info(f"✅ No posts after ID {start_id}. The export is up to date.")
+        return True
+
+    posts_per_shard = math.ceil(total_posts / num_shards)
+    logging.info(f"🚀 Exporting {total_posts} posts after ID {start_id} into {num_shards} {compression} shard(s)...")
+
+    shard = None
+
+    def close_shard():
+        shard["stream"].close()
+        os.replace(shard["tmp_path"], shard["path"])
+        manifest["shards"].append({
+            "file": os.path.basename(shard["path"]),
+            "first_id": shard["first_id"],
+            "last_id": shard["last_id"],
+            "posts": shard["posts"],
+            "sentences": shard["sentences"],
+            "compression": compression,
+        })
+        manifest["last_id"] = shard["last_id"]
+        write_manifest(output_dir, manifest)
+
+    progress_bar = tqdm(total=total_posts, desc="Exporting", unit=" posts", dynamic_ncols=True)
+
+    for post_id, tokenized_text in stream_tokenized_posts(start_id=start_id, itersize=itersize):
+        if shard is None:
+            path = os.path.join(output_dir, f"shard-{len(manifest['shards']):05d}{SHARD_EXTENSIONS[compression]}")
+            shard = {
+                "path": path,
+                "tmp_path": path + ".tmp" + SHARD_EXTENSIONS[compression],  # Same extension, same compression
+                "first_id": post_id,
+                "posts": 0,
+                "sentences": 0,
+            }
+            shard["stream"] = open_shard(shard["tmp_path"], "wt")
+
+        if tokenized_text:
+            shard["stream"].write(tokenized_text)
+            shard["stream"].write("\n")
+            shard["sentences"] += 1
+        shard["posts"] += 1
+        shard["last_id"] = post_id
+
+        if shard["posts"] >= posts_per_shard:
+            close_shard()
+            shard = None
+        progress_bar.update(1)
+
+    if shard is not None:
+        close_shard()
+
+    progress_bar.close()
+    logging.info(f"🎉 Export complete up to ID {manifest['last_id']} ({len(manifest['shards'])} shards in {output_dir}).")
+    return True
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Export tokenized posts to sharded sentence files for training.")
+    parser.add_argument("--output", type=str, default="./sentences", help="Output directory (default: ./sentences)")
+    parser.add_argument("--shards", type=int, default=8, help="Number of shards for the new posts (default: 8)")
+    parser.add_argument("--compression", choices=list(SHARD_EXTENSIONS), default="none",
+                        help="Shard compression, zstd needs the zstandard package (default: none)")
+    args = parser.parse_args()
+
+    if not export_sentences(args.output, num_shards=max(1, args.shards), compression=args.compression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
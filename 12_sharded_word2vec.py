@@ -0,0 +1,108 @@
+import os
+import sys
+import pickle
+import logging
+import argparse
+import yaml
+from train_config import load_config, make_corpus, make_phraser, new_model
+from training import average_shards, build_shared_vocab, train_shard, train_shards_local
+
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+VOCAB_FILE = "vocab.model"  # Untrained model with the shared vocabulary
+PARTS_FILE = "parts.pkl"  # Corpus of every shard, fixed by the vocab step so all tasks agree
+
+
+def shard_path(shard_dir, index):
+    return os.path.join(shard_dir, f"shard-{index:03d}.model")
+
+
+# **Function to Build the Shared Vocabulary and Split the Corpus (run once, before the shards)**
+def prepare(config):
+    shard_dir = config["shard_dir"]
+    os.makedirs(shard_dir, exist_ok=True)
+
+    add_phrases, _ = make_phraser(config)
+    corpus = make_corpus(config)
+    build_shared_vocab(new_model(config), add_phrases(corpus), os.path.join(shard_dir, VOCAB_FILE),
+                       count_workers=config["count_workers"], max_vocab_size=config["max_vocab_size"])
+
+    parts = [add_phrases(part) for part in corpus.split(config["shards"])]
+    with open(os.path.join(shard_dir, PARTS_FILE), "wb") as f:
+        pickle.dump(parts, f)
+    logging.info(f"✅ Corpus split into {len(parts)} shard(s) in {shard_dir}.")
+    return parts
+
+
+def load_parts(config):
+    with open(os.path.join(config["shard_dir"], PARTS_FILE), "rb") as f:
+        return pickle.load(f)
+
+
+# **Function to Train the Shard of this Task**
+def train_task(config, index):
+    parts = load_parts(config)
+    if index >= len(parts):
+        logging.info(f"✅ Task {index}: no shard left ({len(parts)} shards).")
+        return
+    logging.info(f"🚂 Task {index}: training shard {index + 1}/{len(parts)}...")
+    train_shard(os.path.join(config["shard_dir"], VOCAB_FILE), parts[index], shard_path(config["shard_dir"], index),
+                config["epochs"], workers=config["workers"], queue_factor=config["queue_factor"])
+
+
+# **Function to Average the Trained Shards into the Final Model**
+def merge(config):
+    shard_paths = [shard_path(config["shard_dir"], index) for index in range(len(load_parts(config)))]
+    missing = [path for path in shard_paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Shards not trained yet: {', '.join(missing)}", flush=True)
+        return False
+    average_shards(os.path.join(config["shard_dir"], VOCAB_FILE), shard_paths, config["model_path"])
+    return True
+
+
+# **Function to Run All Steps on this Machine (stand-in for the SLURM job)**
+def run_local(config, processes):
+    parts = prepare(config)
+    shard_paths = [shard_path(config["shard_dir"], index) for index in range(len(parts))]
+    train_shards_local(os.path.join(config["shard_dir"], VOCAB_FILE), parts, shard_paths, config["epochs"],
+                       workers=max(1, config["workers"] // processes), processes=processes)
+    return merge(config)
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Data-parallel Word2Vec: shards trained on a shared vocabulary, then averaged.")
+    parser.add_argument("step", choices=["vocab", "shard", "merge", "local"],
+                        help="vocab: shared vocabulary and split (once), shard: train the shard of this task "
+                             "(srun, one task per shard), merge: average the shards, local: all steps with local processes")
+    parser.add_argument("--config", type=str, default=None, help="YAML config file, e.g. configs/sharded_word2vec.yaml")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config value, e.g. --set shards=8 (repeatable)")
+    parser.add_argument("--index", type=int, default=int(os.getenv("SLURM_PROCID", "0")),
+                        help="Shard trained by this task (default: SLURM_PROCID)")
+    parser.add_argument("--processes", type=int, default=2, help="Shards trained at the same time by the local step (default: 2)")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.overrides)
+    except ValueError as e:
+        print(e, flush=True)
+        sys.exit(1)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"❌ Could not read the config: {e}", flush=True)
+        sys.exit(1)
+
+    if args.step == "vocab":
+        prepare(config)
+    elif args.step == "shard":
+        train_task(config, args.index)
+    elif args.step == "merge":
+        if not merge(config):
+            sys.exit(1)
+    elif not run_local(config, max(1, args.processes)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
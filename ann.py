@@ -0,0 +1,166 @@
+import os
+import time
+import logging
+import numpy as np
+from vectors import MAX_SCORES, SimilarityIndex
+
+# Index files are stored next to the snapshot they index: <snapshot without extension>.ivf.npz
+ANN_EXTENSION = ".ivf.npz"
+
+NPROBE = 32  # Clusters scanned per query: higher is slower and closer to exact search
+ITERATIONS = 10  # k-means iterations when building
+SAMPLE_PER_CLUSTER = 64  # Vectors sampled per cluster to train the k-means
+
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+
+def ann_path(snapshot_path):
+    """Returns where the ANN index of a snapshot is stored: next to it, with a .ivf.npz extension."""
+    return os.path.splitext(snapshot_path)[0] + ANN_EXTENSION
+
+
+def default_nlist(vocab_size):
+    """Number of clusters for a vocabulary: about its square root."""
+    return max(1, int(np.sqrt(vocab_size)))
+
+
+def assign(vectors, centroids):
+    """Returns the closest (cosine) centroid of every unit vector, in chunks bounding the score matrix."""
+    chunk_size = max(1, MAX_SCORES // len(centroids))
+    return np.concatenate([
+        np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), chunk_size)
+    ])
+
+
+class IVFIndex(SimilarityIndex):
+    """
+    Approximate top-N similarity (inverted file index, pure NumPy): the unit vectors are clustered with
+    spherical k-means, and a query only scans the words of its `nprobe` closest clusters, which are then
+    re-ranked with their exact scores. Same queries and results format as SimilarityIndex.
+    :param wv: KeyedVectors the index was built from
+    :param centroids: Unit cluster centroids (nlist x vector size)
+    :param order: Word indexes sorted by cluster
+    :param offsets: Words of cluster c are order[offsets[c]:offsets[c + 1]]
+    :param nprobe: Clusters scanned per query
+    """
+
+    def __init__(self, wv, centroids, order, offsets, nprobe=NPROBE):
+        super().__init__(wv)
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, wv, nlist=None, iterations=ITERATIONS, nprobe=NPROBE, seed=1):
+        """
+        Clusters the vocabulary: k-means on a sample of the vectors, then every word assigned to its closest centroid.
+        :param nlist: Number of clusters (default: about the square root of the vocabulary size)
+        :return: IVFIndex
+        """
+        index = cls(wv, None, None, None, nprobe)
+        normed = index.normed
+        nlist = min(nlist or default_nlist(len(normed)), len(normed))
+        rng = np.random.default_rng(seed)
+
+        start = time.perf_counter()
+        sample_size = min(len(normed), nlist * SAMPLE_PER_CLUSTER)
+        sample = normed[np.sort(rng.choice(len(normed), sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]  # Re-seed empty clusters
+            centroids = sums / np.where(empty[:, None], 1.0, norms)
+
+        labels = assign(normed, centroids)
+        index.centroids = centroids.astype(np.float32)
+        index.order = np.argsort(labels, kind="stable").astype(np.int64)
+        index.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=nlist))]).astype(np.int64)
+        logging.info(f"✅ Built an IVF index of {nlist} clusters over {len(normed)} words "
+                     f"in {time.perf_counter() - start:.1f}s.")
+        return index
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 vocab_size=len(self.normed), vector_size=self.normed.shape[1])
+
+    @classmethod
+    def load(cls, wv, path, nprobe=NPROBE):
+        """
+        Loads an index saved for `wv`.
+        :return: IVFIndex, or None if it was built for a different vocabulary
+        """
+        with np.load(path) as data:
+            if int(data["vocab_size"]) != len(wv) or int(data["vector_size"]) != wv.vector_size:
+                return None
+            return cls(wv, data["centroids"], data["order"], data["offsets"], nprobe)
+
+    def most_similar(self, queries, topn=10):
+        """
+        :param queries: List of queries, each a key or a list of keys whose mean is queried (all in the vocabulary)
+        :param topn: Number of neighbours per query, the query's own keys excluded
+        :return: List of [(key, similarity), ...] per query, most similar first
+        """
+        if not queries:
+            return []
+        vectors, indexes = self.query_vectors(queries)
+        nprobe = min(self.nprobe, len(self.centroids))
+
+        # Queries in chunks whose shortlists (indexes + scores, ~3x the size of float32 scores) fit in MAX_SCORES
+        chunk_size = max(1, MAX_SCORES // (3 * nprobe * max(1, len(self.normed) // len(self.centroids))))
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            results.extend(self.search(vectors[start:start + chunk_size], indexes[start:start + chunk_size],
+                                       nprobe, topn))
+        return results
+
+    def search(self, vectors, indexes, nprobe, topn):
+        """Top-N of a chunk of unit query vectors, scanning their `nprobe` closest clusters."""
+        probes = np.argsort(-(vectors @ self.centroids.T), axis=1)[:, :nprobe]
+
+        # Every probed cluster is scored once for all the queries probing it (one matrix product per cluster)
+        shortlist = [([], []) for _ in vectors]  # Per query: candidate word indexes and their exact scores
+        for cluster in np.unique(probes):
+            rows = np.flatnonzero((probes == cluster).any(axis=1))
+            members = self.order[self.offsets[cluster]:self.offsets[cluster + 1]]
+            scores = self.normed[members] @ vectors[rows].T
+            for column, row in enumerate(rows):
+                shortlist[row][0].append(members)
+                shortlist[row][1].append(scores[:, column])
+
+        results = []
+        for keys, (candidates, scores) in zip(indexes, shortlist):
+            candidates, scores = np.concatenate(candidates), np.concatenate(scores)
+            scores[np.isin(candidates, keys)] = -np.inf  # Like most_similar(), never return the query itself
+            best = np.argpartition(scores, -topn)[-topn:] if topn < len(scores) else np.arange(len(scores))
+            best = best[np.argsort(-scores[best])]
+            results.append([
+                (self.wv.index_to_key[candidates[i]], float(scores[i])) for i in best if scores[i] > -np.inf
+            ])
+        return results
+
+
+# **Function to Load the ANN Index of a Snapshot, Building and Saving it the First Time**
+def load_or_build_ann(wv, snapshot_path, nprobe=NPROBE):
+    """
+    :param wv: KeyedVectors loaded from `snapshot_path`
+    :param snapshot_path: Snapshot file, the index is stored next to it
+    :return: IVFIndex
+    """
+    path = ann_path(snapshot_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(snapshot_path):
+        index = IVFIndex.load(wv, path, nprobe)
+        if index is not None:
+            logging.info(f"✅ Loaded the ANN index {path}.")
+            return index
+    logging.info(f"🔄 Building the ANN index of {snapshot_path}...")
+    index = IVFIndex.build(wv, nprobe=nprobe)
+    index.save(path)
+    logging.info(f"💾 ANN index saved to {path}.")
+    return index
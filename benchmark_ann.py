@@ -0,0 +1,82 @@
+import time
+import argparse
+import numpy as np
+from gensim.models import KeyedVectors
+from ann import IVFIndex, NPROBE, load_or_build_ann
+from vectors import SimilarityIndex, load_vectors
+
+
+def synthetic_vectors(num_words, vector_size=200, clusters=1000, seed=7):
+    """Builds clustered random vectors (words around topic centers), a stand-in for a trained model."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, vector_size))
+    vectors = centers[rng.integers(0, clusters, num_words)] + 0.6 * rng.standard_normal((num_words, vector_size))
+    wv = KeyedVectors(vector_size)
+    wv.add_vectors([f"word{i}" for i in range(num_words)], vectors.astype(np.float32))
+    return wv
+
+
+def attribute_queries(wv):
+    """The quality attributes the model knows, as n-grams like 06_evaluation.py queries them."""
+    from database import read_quality_attributes
+
+    ngrams = [attribute.replace(" ", "_") for attribute in read_quality_attributes()]
+    return [ngram for ngram in ngrams if ngram in wv]
+
+
+def recall(approximate, exact):
+    """Mean recall@N: share of the exact top-N neighbours the approximate search also returned."""
+    return float(np.mean([
+        len({key for key, _ in found} & {key for key, _ in expected}) / max(len(expected), 1)
+        for found, expected in zip(approximate, exact)
+    ]))
+
+
+def timed(index, queries, topn):
+    """Runs the queries and returns (results, seconds)."""
+    start = time.perf_counter()
+    results = index.most_similar(queries, topn=topn)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@N and speed of the IVF index against exact search.")
+    parser.add_argument("--model", type=str, default=None, help="Snapshot (.kv) or model to index (default: synthetic vectors)")
+    parser.add_argument("--words", type=int, default=200000, help="Synthetic vocabulary size (default: 200000)")
+    parser.add_argument("--queries", type=int, default=500, help="Number of sampled query words (default: 500)")
+    parser.add_argument("--db", action="store_true", help="Query the quality attributes instead of sampled words")
+    parser.add_argument("--topn", type=int, default=200, help="N of recall@N (default: 200, like 06_evaluation.py)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, NPROBE, 64], help="nprobe values to compare")
+    args = parser.parse_args()
+
+    if args.model:
+        wv = load_vectors(args.model)
+        start = time.perf_counter()
+        ivf = load_or_build_ann(wv, args.model)
+    else:
+        wv = synthetic_vectors(args.words)
+        start = time.perf_counter()
+        ivf = IVFIndex.build(wv)
+    build_time = time.perf_counter() - start
+
+    if args.db:
+        queries = attribute_queries(wv)
+    else:
+        rng = np.random.default_rng(1)
+        queries = [wv.index_to_key[i] for i in rng.choice(len(wv), min(args.queries, len(wv)), replace=False)]
+
+    print(f"🔄 {len(queries)} queries, top {args.topn}, over {len(wv)} words "
+          f"({len(ivf.centroids)} clusters, index ready in {build_time:.1f}s)...", flush=True)
+
+    exact, exact_time = timed(SimilarityIndex(wv), queries, args.topn)
+    print(f"   Exact:       {len(queries) / exact_time:,.0f} queries/sec", flush=True)
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        approximate, approximate_time = timed(ivf, queries, args.topn)
+        print(f"   nprobe={nprobe:<4} recall@{args.topn} {recall(approximate, exact):.4f}, "
+              f"{len(queries) / approximate_time:,.0f} queries/sec ({exact_time / approximate_time:.1f}x)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import re
+import time
+import random
+import argparse
+from text_cleaner import TextCleaner
+
+
+# ---------------------------- LEGACY IMPLEMENTATION (BASELINE) ----------------------------
+
+def legacy_clean_markdown(text, preserve_inline_code=True):
+    """Pre-TextCleaner version of clean_markdown, kept as the baseline."""
+    if not text:
+        return None
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'\[([^\]]+)\]\((https?:\/\/[^\s]+)\)', r'\1', text)
+    text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
+    if preserve_inline_code:
+        text = re.sub(r'`([^`]*)`', r'\1', text)
+    else:
+        text = re.sub(r'`([^`]*)`', '', text)
+    text = re.sub(r'[#*_>~-]+', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'@\w+', '', text.lower())
+    return text
+
+
+def legacy_extract_libraries_from_code(text):
+    """Pre-TextCleaner version of extract_libraries_from_code, kept as the baseline."""
+    if not text:
+        return None
+    COMMON_VARIABLES = {"i", "x", "y", "z", "data", "query", "item", "row", "col", "temp", "val"}
+    PACKAGE_MANAGERS = {
+        "PureScript": ["pulp dep install"], "Objective-C": ["pod install", "carthage update"],
+        "C++": ["vcpkg install", "conan install"],
+        "JavaScript": ["npm install", "yarn add", "bower install", "meteor add"],
+        "Java": ["mvn install", "gradle dependencies"], "Python": ["pip install", "conda install"],
+        "C#": ["dotnet add package", "nuget install"], "PHP": ["composer require"],
+        "Ruby": ["gem install", "bundle add"], "Rust": ["cargo install", "cargo add"],
+        "CSS": ["bower install"], "Dart": ["pub add"], "Perl": ["cpan install"], "R": ["install.packages"],
+        "Clojure": ["clojure -Sdeps"], "Elixir": ["mix deps.get"], "C": ["vcpkg install", "conan install"],
+        "Puppet": ["puppet module install"], "Swift": ["swift package add", "pod install", "carthage update"],
+        "Julia": ["Pkg.add"], "Elm": ["elm install"], "D": ["dub add"], "Nim": ["nimble install"],
+        "Haxe": ["haxelib install"], "Go": ["go get"]
+    }
+    INSTALL_COMMANDS = [cmd for commands in PACKAGE_MANAGERS.values() for cmd in commands]
+    INSTALL_REGEX = r'\b(?:' + '|'.join(re.escape(cmd) for cmd in INSTALL_COMMANDS) + r')\s+["\']?([a-zA-Z0-9._-]+)["\']?'
+    IMPORT_REGEX = r'^\s*(?:import|require|include|using)\s+["\'<]?([a-zA-Z0-9._-]+)["\'>]?'
+    PYTHON_FROM_IMPORT_REGEX = r'^\s*from\s+([a-zA-Z0-9._-]+)\s+import\s+'
+    code_blocks = re.findall(r'`{1,3}(.*?)`{1,3}', text, re.DOTALL)
+    libraries = set()
+    for block in code_blocks:
+        matches = (
+            re.findall(INSTALL_REGEX, block, re.IGNORECASE) +
+            re.findall(IMPORT_REGEX, block, re.IGNORECASE) +
+            re.findall(PYTHON_FROM_IMPORT_REGEX, block, re.IGNORECASE)
+        )
+        for match in matches:
+            if match not in COMMON_VARIABLES:
+                libraries.add(match)
+    return ', '.join(libraries) if libraries else None
+
+
+# ---------------------------- SAMPLE CORPUS ----------------------------
+
+WORDS = (
+    "the a performance security usability database query index thread memory cache latency "
+    "function class method server client request response error exception compile build deploy "
+    "test python java javascript react node docker kubernetes linux windows api json xml http"
+).split()
+
+SNIPPETS = [
+    "Check the [docs](https://docs.python.org/3/library/re.html) first.",
+    "![diagram](https://i.sstatic.net/abc.png)",
+    "Use `{lib}.connect()` instead of the loop.",
+    "```\npip install {lib}\nimport {lib}\n```",
+    "```\nfrom {lib} import Client\nclient = Client()\n```",
+    "Run `npm install {lib} --save` and then `yarn add {lib}-cli`.",
+    "`#include <{lib}.h>`",
+    "## Update\n- first item\n- *second* item\n> quoted **bold** text",
+    "@john_doe thanks, that ~~fixed~~ solved it!",
+    "Thanks, this works.",
+]
+
+LIBRARIES = ["numpy", "requests", "lodash", "express", "boost", "serde", "pandas", "flask", "sys", "x"]
+
+
+def sample_corpus(num_posts=5000, seed=42):
+    """
+    Builds a fixed, seeded corpus of synthetic Stack Overflow post bodies and titles
+    mixing prose, links, images, inline code, code blocks and install commands.
+    :return: List of (title, body)
+    """
+    rng = random.Random(seed)
+    posts = []
+    for _ in range(num_posts):
+        paragraphs = []
+        for _ in range(rng.randint(2, 8)):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+            if rng.random() < 0.6:
+                sentence += " " + rng.choice(SNIPPETS).format(lib=rng.choice(LIBRARIES))
+            paragraphs.append(sentence)
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))).capitalize() + "?"
+        posts.append((title, "\n\n".join(paragraphs)))
+    return posts
+
+
+# ---------------------------- BENCHMARK ----------------------------
+
+def run(clean_markdown, extract_libraries, posts):
+    """Cleans every post like clean_post() in 01_clean_data.py and returns (results, seconds)."""
+    start = time.perf_counter()
+    results = [
+        (clean_markdown(title), clean_markdown(body), extract_libraries(body))
+        for title, body in posts
+    ]
+    return results, time.perf_counter() - start
+
+
+def libraries_set(value):
+    return set(value.split(", ")) if value else set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy cleaning functions with TextCleaner.")
+    parser.add_argument("--posts", type=int, default=5000, help="Number of posts in the sample corpus (default: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the best one is reported (default: 3)")
+    args = parser.parse_args()
+
+    posts = sample_corpus(args.posts)
+    cleaner = TextCleaner()
+
+    print(f"🔄 Cleaning {len(posts)} sample posts, best of {args.repeat} runs...", flush=True)
+
+    legacy_time = new_time = float("inf")
+    for _ in range(args.repeat):
+        legacy_results, elapsed = run(legacy_clean_markdown, legacy_extract_libraries_from_code, posts)
+        legacy_time = min(legacy_time, elapsed)
+        new_results, elapsed = run(cleaner.clean_markdown, cleaner.extract_libraries_from_code, posts)
+        new_time = min(new_time, elapsed)
+
+    # Library order was never defined (set), so libraries are compared as sets
+    mismatches = sum(
+        1 for old, new in zip(legacy_results, new_results)
+        if old[:2] != new[:2] or libraries_set(old[2]) != libraries_set(new[2])
+    )
+
+    print(f"   Legacy:      {len(posts) / legacy_time:,.0f} posts/sec", flush=True)
+    print(f"   TextCleaner: {len(posts) / new_time:,.0f} posts/sec ({legacy_time / new_time:.1f}x)", flush=True)
+    print(f"   Posts with different output: {mismatches}/{len(posts)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
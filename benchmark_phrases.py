@@ -0,0 +1,80 @@
+import time
+import random
+import argparse
+import tracemalloc
+from corpus import PhraseCorpus
+from benchmark_cleaning import WORDS
+
+
+# ---------------------------- LEGACY IMPLEMENTATION (BASELINE) ----------------------------
+
+def legacy_generate_phrases(sentences, phrase_length=7):
+    """Pre-PhraseCorpus generate_phrases() of the 7-gram trainers, kept as the baseline."""
+    phrase_sentences = []
+    for sentence in sentences:
+        new_sentence = sentence.copy()
+        for n in range(2, phrase_length + 1):
+            ngrams = ["_".join(sentence[i:i + n]) for i in range(len(sentence) - n + 1)]
+            new_sentence.extend(ngrams)
+        phrase_sentences.append(new_sentence)
+    return phrase_sentences
+
+
+# ---------------------------- BENCHMARK ----------------------------
+
+def sample_sentences(num_sentences, seed=42):
+    """Builds a fixed, seeded batch of tokenized posts (40 to 200 tokens, like fetch_tokenized_batches)."""
+    rng = random.Random(seed)
+    return [[rng.choice(WORDS) for _ in range(rng.randint(40, 200))] for _ in range(num_sentences)]
+
+
+def consume(corpus, passes):
+    """Walks the corpus `passes` times like gensim does (vocab scan + epochs), returning the word count."""
+    words = 0
+    for _ in range(passes):
+        for sentence in corpus:
+            words += len(sentence)
+    return words
+
+
+def measure(build, passes):
+    """
+    Builds the corpus and walks it twice: timed, then traced (tracemalloc slows allocations down).
+    :return: (words, peak traced MB, seconds)
+    """
+    start = time.perf_counter()
+    words = consume(build(), passes)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    consume(build(), passes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return words, peak / 1024 ** 2, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of the legacy n-gram list with PhraseCorpus.")
+    parser.add_argument("--sentences", type=int, default=10000, help="Sentences in the batch (default: 10000)")
+    parser.add_argument("--max-n", type=int, default=7, help="Maximum n-gram length (default: 7)")
+    parser.add_argument("--passes", type=int, default=6, help="Passes over the batch, vocab scan + epochs (default: 6)")
+    args = parser.parse_args()
+
+    sentences = sample_sentences(args.sentences)
+    print(f"🔄 Generating up to {args.max_n}-grams for {len(sentences)} sentences, {args.passes} passes...", flush=True)
+
+    legacy_words, legacy_peak, legacy_time = measure(
+        lambda: legacy_generate_phrases(sentences, args.max_n), args.passes)
+    lazy_words, lazy_peak, lazy_time = measure(
+        lambda: PhraseCorpus(sentences, max_n=args.max_n), args.passes)
+
+    identical = legacy_generate_phrases(sentences[:100], args.max_n) == list(PhraseCorpus(sentences[:100], args.max_n))
+
+    print(f"   List:         peak {legacy_peak:,.1f} MB, {legacy_time:.2f}s", flush=True)
+    print(f"   PhraseCorpus: peak {lazy_peak:,.1f} MB, {lazy_time:.2f}s "
+          f"({legacy_peak / max(lazy_peak, 1e-6):,.0f}x less memory)", flush=True)
+    print(f"   Same words: {legacy_words == lazy_words}, same sentences: {identical}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import argparse
+from train_config import load_config, make_corpus, make_phraser, new_model
+from training import average_shards, build_shared_vocab, train_shard, train_shards_local
+
+
+def attribute_neighbours(model, attributes, topn):
+    """:return: {attribute n-gram: [top-N similar words]} for the attributes in the model vocabulary"""
+    neighbours = {}
+    for attribute in attributes:
+        attribute_ngram = attribute.replace(" ", "_")
+        if attribute_ngram in model.wv:
+            neighbours[attribute_ngram] = model.wv.most_similar(attribute_ngram, topn=topn)
+    return neighbours
+
+
+def related_count(similar_words, threshold=0.7):
+    """Number of related words 05_find_related_words.py would store (similarity >= 0.7)."""
+    return sum(1 for _, similarity in similar_words if similarity >= threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one Word2Vec model with the average of shard models on the quality attributes.")
+    parser.add_argument("--config", type=str, default=None, help="YAML config file (default: the trainer defaults)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config value, e.g. --set source=files (repeatable)")
+    parser.add_argument("--shards", type=int, default=4, help="Number of shards (default: 4)")
+    parser.add_argument("--processes", type=int, default=2, help="Shards trained at the same time (default: 2)")
+    parser.add_argument("--topn", type=int, default=20, help="Neighbours compared per attribute (default: 20)")
+    parser.add_argument("--attributes", type=str, default=None,
+                        help="Comma-separated attributes instead of reading the quality_attributes table")
+    parser.add_argument("--output", type=str, default="./benchmark_sharded", help="Work directory (default: ./benchmark_sharded)")
+    args = parser.parse_args()
+
+    config = load_config(args.config, args.overrides + [f"shards={args.shards}"])
+
+    if args.attributes:
+        attributes = [attribute.strip() for attribute in args.attributes.split(",") if attribute.strip()]
+    else:
+        from database import read_quality_attributes
+        attributes = read_quality_attributes()
+    if not attributes:
+        print("❌ No quality attributes to compare on.", flush=True)
+        sys.exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    vocab_path = os.path.join(args.output, "vocab.model")
+    add_phrases, _ = make_phraser(config)
+    corpus = make_corpus(config)
+
+    print("🔎 Building the shared vocabulary...", flush=True)
+    build_shared_vocab(new_model(config), add_phrases(corpus), vocab_path, count_workers=config["count_workers"])
+
+    print("🚂 Training one model on the whole corpus...", flush=True)
+    start = time.perf_counter()
+    full_path = train_shard(vocab_path, add_phrases(corpus), os.path.join(args.output, "full.model"),
+                            config["epochs"], workers=config["workers"])
+    full_time = time.perf_counter() - start
+
+    parts = [add_phrases(part) for part in corpus.split(args.shards)]
+    print(f"🚂 Training {len(parts)} shards with {args.processes} processes and averaging them...", flush=True)
+    start = time.perf_counter()
+    shard_paths = [os.path.join(args.output, f"shard-{index:03d}.model") for index in range(len(parts))]
+    train_shards_local(vocab_path, parts, shard_paths, config["epochs"],
+                       workers=max(1, config["workers"] // args.processes), processes=args.processes)
+    averaged = average_shards(vocab_path, shard_paths, os.path.join(args.output, "averaged.model"))
+    sharded_time = time.perf_counter() - start
+
+    from gensim.models import Word2Vec
+    full = Word2Vec.load(full_path)
+    full_neighbours = attribute_neighbours(full, attributes, args.topn)
+    averaged_neighbours = attribute_neighbours(averaged, attributes, args.topn)
+
+    overlaps = [
+        len({w for w, _ in full_neighbours[key]} & {w for w, _ in averaged_neighbours[key]}) / args.topn
+        for key in full_neighbours
+    ]
+    full_related = sum(related_count(words) for words in full_neighbours.values())
+    averaged_related = sum(related_count(words) for words in averaged_neighbours.values())
+
+    print(f"📊 Quality attributes in the vocabulary: {len(full_neighbours)}/{len(attributes)}", flush=True)
+    print(f"   Top-{args.topn} overlap with the single model: {sum(overlaps) / max(len(overlaps), 1):.2%}", flush=True)
+    print(f"   Related words (similarity >= 0.7): single {full_related}, averaged {averaged_related}", flush=True)
+    print(f"   Training time: single {full_time:.1f}s, sharded {sharded_time:.1f}s "
+          f"({full_time / max(sharded_time, 1e-9):.1f}x)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import time
+import random
+import argparse
+from collections import Counter
+from tokenizer import Tokenizer
+from text_cleaner import clean_markdown
+from benchmark_cleaning import sample_corpus
+
+# Extra sentences covering the cases where the regex backend can differ from word_tokenize
+EDGE_CASES = [
+    "I can't install it, won't you try? It's version 3.14 or 1,000 rows at 10:30.",
+    "Use node.js and e.g. c++ with client/server in real-time.",
+    "You cannot do that, gonna need a lock.",
+    "He said \"hello\" (world) [x] {y} <z> and the users' files... 'quoted' text.",
+    "See http://example.com/foo?bar=1 for the docs. Mr. Smith's answer works!",
+    "O'Neil's code doesn't compile; isn't it?",
+]
+
+
+def sample_posts(num_posts, seed=7):
+    """
+    Builds the fixed sample: cleaned synthetic posts (see benchmark_cleaning.py) mixed with edge cases.
+    :return: List of (title, body) as stored in stage_posts_cleaned
+    """
+    rng = random.Random(seed)
+    posts = []
+    for title, body in sample_corpus(num_posts, seed=seed):
+        body = clean_markdown(body)
+        if rng.random() < 0.3:
+            body = f"{body} {clean_markdown(rng.choice(EDGE_CASES))}"
+        posts.append((clean_markdown(title), body))
+    return posts
+
+
+def db_posts(num_posts):
+    """Reads the first `num_posts` cleaned posts from stage_posts_cleaned."""
+    from database import read_cleaned_posts
+
+    posts = []
+    for batch in read_cleaned_posts(batch_size=min(num_posts, 10000)):
+        posts.extend((row[2], row[3]) for row in batch if (row[2] or row[3]))
+        if len(posts) >= num_posts:
+            break
+    return posts[:num_posts]
+
+
+def run(tokenizer, posts):
+    """Tokenizes every post and returns (tokens per post, seconds)."""
+    start = time.perf_counter()
+    results = [tokenizer.preprocess(title, body)[1] for title, body in posts]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the regex tokenizer backend with NLTK word_tokenize.")
+    parser.add_argument("--posts", type=int, default=5000, help="Number of sample posts (default: 5000)")
+    parser.add_argument("--db", action="store_true", help="Use real posts from stage_posts_cleaned instead of the synthetic sample")
+    args = parser.parse_args()
+
+    posts = db_posts(args.posts) if args.db else sample_posts(args.posts)
+    nltk_tokenizer = Tokenizer("nltk")
+    regex_tokenizer = Tokenizer("regex")
+
+    print(f"🔄 Tokenizing {len(posts)} posts with both backends...", flush=True)
+    nltk_results, nltk_time = run(nltk_tokenizer, posts)
+    regex_results, regex_time = run(regex_tokenizer, posts)
+
+    # Equivalence: identical posts, and token-level overlap (as multisets) over the whole sample
+    identical = sum(1 for a, b in zip(nltk_results, regex_results) if a == b)
+    only_nltk, only_regex, common = Counter(), Counter(), 0
+    for a, b in zip(nltk_results, regex_results):
+        a, b = Counter(a), Counter(b)
+        common += sum((a & b).values())
+        only_nltk.update(a - b)
+        only_regex.update(b - a)
+
+    nltk_total = sum(len(tokens) for tokens in nltk_results)
+    regex_total = sum(len(tokens) for tokens in regex_results)
+
+    print("📊 Equivalence (regex vs nltk):", flush=True)
+    print(f"   Identical posts:  {identical}/{len(posts)} ({identical / max(len(posts), 1):.2%})", flush=True)
+    print(f"   Token recall:     {common / max(nltk_total, 1):.4%} of the nltk tokens", flush=True)
+    print(f"   Token precision:  {common / max(regex_total, 1):.4%} of the regex tokens", flush=True)
+    print(f"   Only in nltk:     {', '.join(f'{w} ({n})' for w, n in only_nltk.most_common(10)) or '-'}", flush=True)
+    print(f"   Only in regex:    {', '.join(f'{w} ({n})' for w, n in only_regex.most_common(10)) or '-'}", flush=True)
+
+    print("🚀 Throughput:", flush=True)
+    print(f"   nltk:  {len(posts) / nltk_time:,.0f} posts/sec", flush=True)
+    print(f"   regex: {len(posts) / regex_time:,.0f} posts/sec ({nltk_time / regex_time:.1f}x)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
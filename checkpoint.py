@@ -0,0 +1,148 @@
+import os
+import copy
+import time
+import logging
+import threading
+import numpy as np
+
+
+# **Function to Save a Model Durably**
+def save_atomically(model, path):
+    """
+    Saves a gensim model as one file (arrays included, no .npy next to it): written to a temp file,
+    fsynced, then renamed over `path`, so `path` always holds a complete model.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        model.save(f)  # A file handle pickles everything into that one file
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def snapshot_model(model):
+    """
+    Copies what training changes in a Word2Vec model (vectors, vocabulary, output weights, noise table),
+    sharing everything else (settings, counters, the vocabulary's key strings). Much faster than a
+    copy.deepcopy: one memcpy per array and a C-level copy of the vocabulary containers.
+    :return: Model to save while the original keeps training
+    """
+    snapshot = copy.copy(model)
+    snapshot.wv = wv = copy.copy(model.wv)
+    wv.vectors = model.wv.vectors.copy()
+    wv.norms = None  # Not saved, recomputed on the first similarity query
+    wv.index_to_key = list(model.wv.index_to_key)
+    wv.key_to_index = dict(model.wv.key_to_index)
+    wv.expandos = {attribute: values.copy() for attribute, values in model.wv.expandos.items()}
+    for name in ("syn1neg", "syn1", "cum_table"):
+        if isinstance(getattr(model, name, None), np.ndarray):
+            setattr(snapshot, name, getattr(model, name).copy())
+    snapshot.lifecycle_events = list(getattr(model, "lifecycle_events", None) or [])
+    return snapshot
+
+
+class AsyncCheckpointer:
+    """
+    Saves training checkpoints in the background so the training loop does not wait for the storage.
+    A copy of the model's arrays and vocabulary (snapshot_model()) is taken in the training process and
+    written by a thread, so training goes on while the copy is saved. The process is never forked: a fork
+    could copy a lock held by another thread (e.g. the prefetcher's database or logging locks) into a child
+    that then hangs, and a forked child's memory grows towards a full copy of the model as training writes
+    to the shared pages. Taking the copy pauses training for about one memcpy of the vectors and output
+    weights, and holds that much memory again while a save is in flight: the job's memory has to fit the
+    model twice. One save runs at a time: when one is still in flight the next checkpoint is skipped.
+    `on_durable(marker)` (e.g. the DB progress update) is only called once the checkpoint holding that
+    marker is on disk, so the progress never runs ahead of the model.
+    :param path: Model path the checkpoints are renamed to
+    :param on_durable: Function called with the marker of every completed checkpoint
+    :param every_rows: Save after at least this many rows since the last checkpoint (None: no row cadence)
+    :param every_seconds: Save after at least this many seconds since the last checkpoint (None: no time cadence)
+    """
+
+    def __init__(self, path, on_durable=None, every_rows=None, every_seconds=None):
+        self.path = path
+        self.on_durable = on_durable
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+
+        self._pending = None  # (thread, marker, started)
+        self._failed = False
+        self.last_marker = None  # Marker of the last checkpoint started
+        self._rows = 0
+        self._last_start = time.monotonic()
+
+    def due(self):
+        """True if the row or time cadence says a checkpoint should be taken now."""
+        if self.every_rows and self._rows >= self.every_rows:
+            return True
+        if self.every_seconds and time.monotonic() - self._last_start >= self.every_seconds:
+            return True
+        return not self.every_rows and not self.every_seconds  # No cadence: every call
+
+    def maybe_save(self, model, marker, rows=0):
+        """
+        Counts `rows` and starts a background checkpoint tagged with `marker` if one is due and none is in flight.
+        :return: True if a checkpoint was started
+        """
+        self._rows += rows
+        self.poll()
+        if not self.due():
+            return False
+        if self._pending is not None:
+            logging.info(f"⏳ Checkpoint still being written, skipping the one at {marker}.")
+            return False
+        self._start(model, marker)
+        return True
+
+    def save(self, model, marker):
+        """Waits for any checkpoint in flight, then saves one tagged with `marker` and waits for it."""
+        self.wait()
+        self._start(model, marker)
+        self.wait()
+        return not self._failed
+
+    def flush(self, model, marker):
+        """Waits for the checkpoint in flight and saves a last one if the model changed since it started."""
+        self.wait()
+        if marker != self.last_marker:
+            return self.save(model, marker)
+        return not self._failed
+
+    def poll(self):
+        """Completes the checkpoint in flight if it has finished, without waiting."""
+        if self._pending is not None and not self._pending[0].is_alive():
+            self._complete()
+
+    def wait(self):
+        """Waits for the checkpoint in flight, if any."""
+        if self._pending is not None:
+            self._pending[0].join()
+            self._complete()
+
+    def _start(self, model, marker):
+        snapshot = snapshot_model(model)  # The copy is taken now, the slow write happens on the thread
+        worker = threading.Thread(target=self._save_in_thread, args=(snapshot,), daemon=True)
+        self._failed = False
+        worker.start()
+        self._pending = (worker, marker, time.monotonic())
+        self.last_marker = marker
+        self._rows = 0
+        self._last_start = time.monotonic()
+
+    def _save_in_thread(self, snapshot):
+        try:
+            save_atomically(snapshot, self.path)
+        except Exception as e:
+            logging.error(f"❌ Error saving checkpoint {self.path}: {e}")
+            self._failed = True
+
+    def _complete(self):
+        worker, marker, started = self._pending
+        self._pending = None
+
+        if self._failed:
+            logging.error(f"❌ Checkpoint at {marker} failed, the progress stays at the previous checkpoint.")
+            return
+        logging.info(f"💾 Checkpoint at {marker} written to {self.path} in {time.monotonic() - started:.1f}s.")
+        if self.on_durable:
+            self.on_durable(marker)
@@ -0,0 +1,228 @@
+import os
+import io
+import gzip
+import json
+
+MANIFEST_FILE = "manifest.json"
+
+# Compression of the shard files and their file extensions
+SHARD_EXTENSIONS = {"none": ".txt", "gzip": ".txt.gz", "zstd": ".txt.zst"}
+
+
+# ---------------------------- SHARD FILES ----------------------------
+
+def open_shard(path, mode="rt"):
+    """
+    Opens a sentence shard file as text, (de)compressing it according to its extension.
+    :param path: Shard file (.txt, .txt.gz or .txt.zst)
+    :param mode: "rt" to read or "wt" to write
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8", compresslevel=6)
+    if path.endswith(".zst"):
+        import zstandard  # Optional dependency, only needed for zstd shards
+
+        binary = open(path, mode.replace("t", "b"))
+        if "w" in mode:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(binary, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(binary, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_manifest(directory):
+    """
+    Reads the manifest of a sharded corpus directory.
+    :return: Manifest dict ({"last_id": ..., "shards": [...]}), empty if there is none yet
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"last_id": 0, "shards": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(directory, manifest):
+    """Writes the manifest atomically (temp file + rename), so readers never see a partial one."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ---------------------------- CORPUS ITERABLES ----------------------------
+
+class SentenceIterator:
+    """Re-iterable corpus over a single sentence file (one tokenized post per line)."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def __iter__(self):
+        with open_shard(self.filepath, "rt") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line.split()  # Already tokenized, lowercased, and cleaned
+
+
+def load_sentences(path, default_file="processed_sentences.txt"):
+    """
+    Returns a re-iterable corpus for the given path:
+    the sharded corpus if it is a directory with a manifest, the single sentence file otherwise.
+    """
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        print(f"📂 Reading sharded sentences from {path}", flush=True)
+        return ShardedCorpus(path)
+    if os.path.isdir(path):
+        path = os.path.join(path, default_file)
+    print(f"📄 Reading sentences from {path}", flush=True)
+    return SentenceIterator(path)
+
+
+class ShardedCorpus:
+    """
+    Re-iterable corpus over the shard files written by 11_export_sentences.py.
+    Every iteration streams the shards from disk, one tokenized sentence (list of words) at a time.
+    :param directory: Directory containing manifest.json and the shards
+    :param start_id: Skip the shards whose posts all have a post_id up to this one
+    :param shards: Optional subset of the manifest shards to read
+    """
+
+    def __init__(self, directory, start_id=0, shards=None):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        if shards is None:
+            shards = [shard for shard in self.manifest["shards"] if shard["last_id"] > start_id]
+        self.shards = shards
+
+    def __len__(self):
+        return sum(shard["sentences"] for shard in self.shards)
+
+    def __iter__(self):
+        for shard in self.shards:
+            yield from self.iter_shard(shard)
+
+    def iter_shard(self, shard):
+        """Yields the sentences of one shard."""
+        with open_shard(os.path.join(self.directory, shard["file"]), "rt") as f:
+            for line in f:
+                words = line.split()
+                if words:
+                    yield words
+
+    def split(self, parts):
+        """Splits the shards into up to `parts` corpora of consecutive shards, e.g. one per worker."""
+        size = max(1, -(-len(self.shards) // max(parts, 1)))
+        return [
+            ShardedCorpus(self.directory, shards=self.shards[i:i + size])
+            for i in range(0, len(self.shards), size)
+        ]
+
+
+class PostgresCorpus:
+    """
+    Re-iterable corpus over public.tokenized_posts, streamed through a server-side cursor on every iteration.
+    :param start_id: Only posts with a post_id greater than this are read
+    :param end_id: Only posts with a post_id up to this are read (default: no limit)
+    :param itersize: Rows fetched from the server at a time
+    """
+
+    def __init__(self, start_id=0, end_id=None, itersize=10000):
+        self.start_id = start_id
+        self.end_id = end_id
+        self.itersize = itersize
+
+    def __iter__(self):
+        from database import stream_tokenized_posts  # Only needed when reading from Postgres
+
+        for _, tokenized_text in stream_tokenized_posts(self.start_id, self.end_id, self.itersize):
+            words = tokenized_text.split() if tokenized_text else None
+            if words:
+                yield words
+
+    def split(self, parts):
+        """
+        Splits the posts into up to `parts` corpora of consecutive post_ids holding about the same
+        number of posts (from the post_id quantiles), e.g. one per worker or per SLURM task.
+        The split only depends on the table content, so every task of a job computes the same one.
+        """
+        from database import tokenized_post_id_bounds, last_tokenized_post
+
+        bounds = tokenized_post_id_bounds(max(parts, 1), self.start_id, self.end_id)
+        if bounds is None:  # Fall back to ranges of the same width
+            end_id = self.end_id if self.end_id is not None else last_tokenized_post()
+            size = max(1, -(-(end_id - self.start_id) // max(parts, 1)))
+            bounds = list(range(self.start_id, end_id, size)) + [end_id]
+        return [
+            PostgresCorpus(first, last, self.itersize)
+            for first, last in zip(bounds, bounds[1:]) if last > first
+        ]
+
+
+class PhraseCorpus:
+    """
+    Re-iterable corpus adding every contiguous n-gram (2 to `max_n` words, joined with "_")
+    to each sentence, generated on the fly every time it is iterated instead of being kept in memory.
+    Yields exactly what generate_phrases() in the 7-gram trainers used to build as a list.
+    :param sentences: Re-iterable of tokenized sentences (e.g. a batch from fetch_tokenized_batches)
+    :param max_n: Maximum length of the n-grams
+    """
+
+    def __init__(self, sentences, max_n=7):
+        self.sentences = sentences
+        self.max_n = max_n
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        for sentence in self.sentences:
+            yield phrase_sentence(sentence, self.max_n)
+
+    def split(self, parts):
+        """Splits like the wrapped corpus (itself if it cannot be split)."""
+        if not hasattr(self.sentences, "split"):
+            return [self]
+        return [PhraseCorpus(part, self.max_n) for part in self.sentences.split(parts)]
+
+
+def phrase_sentence(sentence, max_n=7):
+    """
+    Returns the words of a sentence followed by its 2-grams, 3-grams, ... up to `max_n`-grams.
+    :param sentence: List of words
+    """
+    new_sentence = list(sentence)  # Copy original words
+    for n in range(2, max_n + 1):  # Generate from 2-grams to max length
+        new_sentence.extend(["_".join(sentence[i:i + n]) for i in range(len(sentence) - n + 1)])
+    return new_sentence
+
+
+class PhrasedCorpus:
+    """
+    Re-iterable corpus applying a learned phrase detector (see phrases.py) to each sentence on the fly,
+    so only the detected multi-word terms ("machine_learning") replace their words.
+    :param sentences: Re-iterable of tokenized sentences
+    :param phraser: Object mapping a list of words to a list of words/phrases (phraser[sentence])
+    """
+
+    def __init__(self, sentences, phraser):
+        self.sentences = sentences
+        self.phraser = phraser
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        for sentence in self.sentences:
+            yield self.phraser[sentence]
+
+    def split(self, parts):
+        """Splits like the wrapped corpus (itself if it cannot be split)."""
+        if not hasattr(self.sentences, "split"):
+            return [self]
+        return [PhrasedCorpus(part, self.phraser) for part in self.sentences.split(parts)]
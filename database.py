@@ -1,6 +1,12 @@
+import io
 import os
 import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 import logging
@@ -22,11 +28,35 @@ DBS_NAME = os.getenv("DBS_NAME")  # Stack Overflow (READ ONLY)
 DBL_NAME = os.getenv("DBL_NAME")  # Libraries.io (READ ONLY)
 DBC_NAME = os.getenv("DBC_NAME")  # Components Insight (WRITE - STAGING TABLES)
 
+# Connection pool size (per database and per process)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
 
-# ---------------------------- DATABASE CONNECTION FUNCTION ----------------------------
+# Tables bulk-loaded with COPY instead of INSERT ... VALUES (comma-separated, e.g. "stage_posts_cleaned,tokenized_posts")
+DB_COPY_TABLES = {table.strip() for table in os.getenv("DB_COPY_TABLES", "").split(",") if table.strip()}
+
+# How tokenized_posts.tokenized_array is stored (tokenized_text holds the same tokens):
+# "jsonb" (JSONB array), "text_array" (compact TEXT[]) or "none" (not written at all)
+TOKENIZED_ARRAY_TYPES = {"jsonb": "JSONB", "text_array": "TEXT[]", "none": None}
+TOKENIZED_ARRAY_MODE = os.getenv("TOKENIZED_ARRAY_MODE", "jsonb").strip().lower()
+if TOKENIZED_ARRAY_MODE not in TOKENIZED_ARRAY_TYPES:
+    raise ValueError(f"❌ Invalid TOKENIZED_ARRAY_MODE '{TOKENIZED_ARRAY_MODE}'. Use one of: {', '.join(TOKENIZED_ARRAY_TYPES)}")
+
+# Tables tracking the last post_id each kind of batch training saved its model after
+TRAINING_PROGRESS_TABLES = {
+    "word2vec": "word2vec_training_progress",
+    "word2vec_7g": "word2vec_7g_training_progress",
+    "word2vec_phrases": "word2vec_phrases_training_progress",
+}
+
+
+# ---------------------------- DATABASE CONNECTION FUNCTIONS ----------------------------
 
 def get_connection(db_name):
-    """Establishes a PostgreSQL database connection for the given database name."""
+    """
+    Establishes a new, unpooled PostgreSQL connection for the given database name.
+    The helpers in this module use `db_connection` / `db_cursor` instead.
+    """
     try:
         return psycopg2.connect(
             dbname=db_name,
@@ -40,166 +70,328 @@ def get_connection(db_name):
         return None
 
 
-# ---------------------------- PAGINATED READ FUNCTIONS ----------------------------
+_pools = {}  # db_name -> ThreadedConnectionPool
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+_inherited_pools = []  # Pools copied from a parent process by fork(), never used nor closed
 
-def read_stackoverflow_posts(batch_size=10000, start_id=0):
+
+def get_pool(db_name):
     """
-    Reads posts from Stack Overflow database in paginated batches.
-    :param batch_size: Number of records per batch (default: 10,000)
-    :yield: Batch of records
+    Returns the connection pool of the given database, creating it on first use.
+    Pools are per process: a forked worker gets its own pools instead of sharing the parent's sockets.
+    :param db_name: DBS_NAME, DBL_NAME or DBC_NAME
+    :return: ThreadedConnectionPool, or None if the database is unreachable
+    """
+    global _pools_pid
+
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Keep the parent's connections referenced so they are not closed (and broken) from here
+            _inherited_pools.extend(_pools.values())
+            _pools.clear()
+            _pools_pid = os.getpid()
+
+        pool = _pools.get(db_name)
+        if pool is None:
+            try:
+                pool = ThreadedConnectionPool(
+                    DB_POOL_MIN_SIZE,
+                    DB_POOL_MAX_SIZE,
+                    dbname=db_name,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    host=DB_HOST,
+                    port=DB_PORT
+                )
+            except Exception as e:
+                print(f"❌ Error connecting to database {db_name}: {e}")
+                return None
+            _pools[db_name] = pool
+
+        return pool
+
+
+@contextmanager
+def db_connection(db_name):
     """
-    conn = get_connection(DBS_NAME)
-    if not conn:
+    Borrows a pooled connection for the given database.
+    Commits when the block succeeds, rolls back when it raises,
+    and always hands the connection back to the pool.
+    :param db_name: DBS_NAME, DBL_NAME or DBC_NAME
+    :yield: psycopg2 connection, or None if the database is unreachable
+    """
+    pool = get_pool(db_name)
+    if pool is None:
+        yield None
         return
 
-    cur = conn.cursor()
-    offset = 0
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
 
-    while True:
-        cur.execute(
-            f"SELECT id, posttypeid, title, body, tags FROM public.posts_md WHERE id > {start_id} ORDER BY id LIMIT %s OFFSET %s;",
-            (batch_size, offset),
-        )
-        rows = cur.fetchall()
 
-        if not rows:
-            break  # No more data
+@contextmanager
+def db_cursor(db_name):
+    """
+    Borrows a pooled connection and opens a cursor on it (see `db_connection`).
+    :param db_name: DBS_NAME, DBL_NAME or DBC_NAME
+    :yield: psycopg2 cursor, or None if the database is unreachable
+    """
+    with db_connection(db_name) as conn:
+        if conn is None:
+            yield None
+            return
+
+        with conn.cursor() as cur:
+            yield cur
+
 
-        yield rows
-        offset += batch_size  # Move to next batch
+def close_pools():
+    """Closes every connection pool opened by this process."""
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
 
-    cur.close()
-    conn.close()
 
+atexit.register(close_pools)
 
-def read_libraries_projects(batch_size=10000):
+
+# ---------------------------- PAGINATED READ FUNCTIONS ----------------------------
+
+class KeysetReader:
     """
-    Reads projects from Libraries.io database in paginated batches.
-    :param batch_size: Number of records per batch (default: 10,000)
-    :yield: Batch of records
+    Iterates over a table in id order using keyset pagination (WHERE id > last_id)
+    instead of LIMIT/OFFSET, so every batch is a cheap index range scan no matter
+    how deep into the table we are.
+    The reader remembers the last id it yielded in `last_id`, so callers can resume
+    exactly where they stopped.
+    :param db_name: Database to read from
+    :param query: SELECT with two placeholders: the last seen id and the batch size
+    :param batch_size: Number of records per batch
+    :param start_id: Only rows with an id greater than this are returned
+    :param key_index: Position of the id column in every row (default: 0)
     """
-    conn = get_connection(DBL_NAME)
-    if not conn:
-        return
 
-    cur = conn.cursor()
-    offset = 0
+    def __init__(self, db_name, query, batch_size=10000, start_id=0, key_index=0):
+        self.db_name = db_name
+        self.query = query
+        self.batch_size = batch_size
+        self.last_id = start_id or 0
+        self.key_index = key_index
 
-    while True:
-        cur.execute(
-            """
-            SELECT 
-                id, name, platform, description 
-            FROM 
-                public.projects 
-            WHERE (
-                jsonb_typeof(raw) = 'object' 
-                AND 
-                (SELECT COUNT(*) FROM jsonb_object_keys(raw)) > 1
-            )
-            ORDER BY id LIMIT %s OFFSET %s;
-            """,
-            (batch_size, offset),
-        )
-        rows = cur.fetchall()
-
-        if not rows:
-            break  # No more data
+    def __iter__(self):
+        while True:
+            # Every page borrows a pooled connection, so none is held while the caller works on a batch
+            with db_cursor(self.db_name) as cur:
+                if cur is None:
+                    return
+                cur.execute(self.query, (self.last_id, self.batch_size))
+                rows = cur.fetchall()
 
-        yield rows
-        offset += batch_size  # Move to next batch
+            if not rows:
+                break  # No more data
 
-    cur.close()
-    conn.close()
+            self.last_id = rows[-1][self.key_index]  # Next batch starts after this id
+            yield rows
 
 
-def read_cleaned_posts(batch_size=10000, start_id=0):
+def read_stackoverflow_posts(batch_size=10000, start_id=0):
     """
-    Reads projects from Libraries.io database in paginated batches.
+    Reads posts from Stack Overflow database in keyset-paginated batches.
     :param batch_size: Number of records per batch (default: 10,000)
-    :yield: Batch of records
+    :param start_id: Only posts with an id greater than this are read
+    :return: KeysetReader yielding batches of records (see `last_id` to resume)
     """
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
+    return KeysetReader(
+        DBS_NAME,
+        """
+        SELECT id, posttypeid, title, body, tags
+        FROM public.posts_md
+        WHERE id > %s
+        ORDER BY id LIMIT %s;
+        """,
+        batch_size=batch_size,
+        start_id=start_id,
+    )
 
-    cur = conn.cursor()
-    offset = 0
 
-    while True:
-        cur.execute(
-            f"SELECT id, posttypeid, title, body, tags, extracted_libraries FROM public.stage_posts_cleaned WHERE id > {start_id} ORDER BY id LIMIT %s OFFSET %s;",
-            (batch_size, offset),
+def read_libraries_projects(batch_size=10000, start_id=0):
+    """
+    Reads projects from Libraries.io database in keyset-paginated batches.
+    :param batch_size: Number of records per batch (default: 10,000)
+    :param start_id: Only projects with an id greater than this are read
+    :return: KeysetReader yielding batches of records (see `last_id` to resume)
+    """
+    return KeysetReader(
+        DBL_NAME,
+        """
+        SELECT 
+            id, name, platform, description 
+        FROM 
+            public.projects 
+        WHERE (
+            id > %s
+            AND
+            jsonb_typeof(raw) = 'object' 
+            AND 
+            (SELECT COUNT(*) FROM jsonb_object_keys(raw)) > 1
         )
-        rows = cur.fetchall()
-
-        if not rows:
-            break  # No more data
+        ORDER BY id LIMIT %s;
+        """,
+        batch_size=batch_size,
+        start_id=start_id,
+    )
 
-        yield rows
-        offset += batch_size  # Move to next batch
 
-    cur.close()
-    conn.close()
+def read_cleaned_posts(batch_size=10000, start_id=0):
+    """
+    Reads cleaned posts from stage_posts_cleaned in keyset-paginated batches.
+    :param batch_size: Number of records per batch (default: 10,000)
+    :param start_id: Only posts with an id greater than this are read
+    :return: KeysetReader yielding batches of records (see `last_id` to resume)
+    """
+    return KeysetReader(
+        DBC_NAME,
+        """
+        SELECT id, posttypeid, title, body, tags, extracted_libraries
+        FROM public.stage_posts_cleaned
+        WHERE id > %s
+        ORDER BY id LIMIT %s;
+        """,
+        batch_size=batch_size,
+        start_id=start_id,
+    )
     
 
 # **Function to Fetch Tokenized Data in Batches**
 def fetch_tokenized_batches(batch_size=10000, start_id=0):
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-    
+    """
+    Reads tokenized posts in keyset-paginated batches.
+    :param batch_size: Number of records per batch (default: 10,000)
+    :param start_id: Only posts with an id greater than this are read
+    :yield: (sentences, last_processed_id, total_processed)
+    """
+    reader = KeysetReader(
+        DBC_NAME,
+        "SELECT post_id, tokenized_text FROM public.tokenized_posts WHERE post_id > %s ORDER BY post_id ASC LIMIT %s;",
+        batch_size=batch_size,
+        start_id=start_id,
+    )
     total_processed = 0
-    offset = 0
 
     try:
-        cur = conn.cursor()
-        while True:
+        for rows in reader:
+            sentences = [row[1].split() for row in rows]  # Convert space-separated text into list of words
+
+            total_processed += len(rows)
+            yield sentences, reader.last_id, total_processed
+
+        logging.info("✅ No more rows to train on. Training completed.")
+
+    except Exception as e:
+        logging.error(f"❌ Error fetching tokenized batches: {e}")
+
+# **Function to Stream Tokenized Posts with a Server-Side Cursor**
+def stream_tokenized_posts(start_id=0, end_id=None, itersize=10000):
+    """
+    Streams tokenized posts in post_id order through a server-side (named) cursor,
+    so the whole table can be read in one query without loading it into memory.
+    :param start_id: Only posts with a post_id greater than this are read
+    :param end_id: Only posts with a post_id up to (and including) this are read (default: no limit)
+    :param itersize: Number of rows fetched from the server at a time
+    :yield: (post_id, tokenized_text)
+    """
+    with db_connection(DBC_NAME) as conn:
+        if conn is None:
+            return
+
+        with conn.cursor(name=f"stream_tokenized_posts_{os.getpid()}") as cur:
+            cur.itersize = itersize
             cur.execute(
-                "SELECT post_id, tokenized_text FROM public.tokenized_posts WHERE post_id > %s ORDER BY post_id ASC LIMIT %s OFFSET %s;",
-                (start_id, batch_size, offset)
+                """
+                SELECT post_id, tokenized_text
+                FROM public.tokenized_posts
+                WHERE post_id > %s AND (%s IS NULL OR post_id <= %s)
+                ORDER BY post_id ASC;
+                """,
+                (start_id, end_id, end_id),
             )
-            rows = cur.fetchall()
+            for row in cur:
+                yield row
 
-            if not rows:
-                logging.info("✅ No more rows to train on. Training completed.")
-                break
 
-            sentences = [row[1].split() for row in rows]  # Convert space-separated text into list of words
-            last_processed_id = rows[-1][0]  # Track last processed ID
+def count_tokenized_posts(start_id=0):
+    """
+    Counts the tokenized posts with a post_id greater than `start_id`.
+    :return: Number of posts (int) or None if an error occurs.
+    """
+    try:
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return None
+            cur.execute("SELECT COUNT(*) FROM public.tokenized_posts WHERE post_id > %s;", (start_id,))
+            return cur.fetchone()[0]
+    except Exception as e:
+        print(f"❌ Error counting tokenized posts: {e}")
+        return None
 
-            total_processed += len(rows)
-            yield sentences, last_processed_id, total_processed
-            offset += batch_size  # Move to next batch
 
+def tokenized_post_id_bounds(parts, start_id=0, end_id=None):
+    """
+    Splits the tokenized posts after `start_id` (up to `end_id`) into `parts` post_id ranges holding
+    about the same number of posts, from the post_id quantiles.
+    :return: List of parts + 1 boundaries (range i is bounds[i] < post_id <= bounds[i + 1]), None on error
+    """
+    fractions = [i / parts for i in range(1, parts)]
+    try:
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return None
+            cur.execute(
+                """
+                SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY post_id), MAX(post_id)
+                FROM public.tokenized_posts
+                WHERE post_id > %s AND (%s IS NULL OR post_id <= %s);
+                """,
+                (fractions, start_id, end_id, end_id),
+            )
+            quantiles, max_id = cur.fetchone()
+            if max_id is None:
+                return [start_id, start_id]
+            return [start_id] + list(quantiles or []) + [max_id]
     except Exception as e:
-        logging.error(f"❌ Error fetching tokenized batches: {e}")
+        print(f"❌ Error splitting the tokenized posts: {e}")
+        return None
 
-    finally:
-        cur.close()
-        conn.close()
 
-# **Function to Fetch Tokenized Data in Batches**       
+# **Function to Fetch Tokenized Data in Batches**
 def fetch_tokenized_sentences(batch_size=10000, start_id=0):
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return []
+    with db_cursor(DBC_NAME) as cur:
+        if cur is None:
+            return []
 
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT post_id, tokenized_text 
-        FROM public.tokenized_posts 
-        WHERE post_id > %s 
-        ORDER BY post_id ASC 
-        LIMIT %s;
-        """,
-        (start_id, batch_size),
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+        cur.execute(
+            """
+            SELECT post_id, tokenized_text
+            FROM public.tokenized_posts
+            WHERE post_id > %s
+            ORDER BY post_id ASC
+            LIMIT %s;
+            """,
+            (start_id, batch_size),
+        )
+        return cur.fetchall()
 
 
 
@@ -207,12 +399,6 @@ def fetch_tokenized_sentences(batch_size=10000, start_id=0):
 
 def create_stage_tables():
     """Creates all staging tables in componentsinsight (DBC_NAME)."""
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-
-    cur = conn.cursor()
-    
     queries = [
         """
         CREATE TABLE IF NOT EXISTS stage_posts_cleaned (
@@ -243,11 +429,11 @@ def create_stage_tables():
             FOREIGN KEY (library_id) REFERENCES stage_libraries_cleaned(id)
         );
         """,
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS tokenized_posts (
             post_id INT PRIMARY KEY,
             tokenized_text TEXT,
-            tokenized_array JSONB,
+            {f"tokenized_array {TOKENIZED_ARRAY_TYPES[TOKENIZED_ARRAY_MODE]}," if TOKENIZED_ARRAY_TYPES[TOKENIZED_ARRAY_MODE] else ""}
             FOREIGN KEY (post_id) REFERENCES stage_posts_cleaned(id)
         );
         """,
@@ -268,6 +454,14 @@ def create_stage_tables():
         );
         """,
         """
+        -- Track the last processed row for training with learned phrases
+        CREATE TABLE IF NOT EXISTS word2vec_phrases_training_progress (
+            id SERIAL PRIMARY KEY,
+            last_processed_id INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT NOW()
+        );
+        """,
+        """
         -- Store trained Word2Vec models
         CREATE TABLE IF NOT EXISTS word2vec_models (
             id SERIAL PRIMARY KEY,
@@ -278,91 +472,50 @@ def create_stage_tables():
         """
     ]
 
-    for query in queries:
-        cur.execute(query)
+    with db_cursor(DBC_NAME) as cur:
+        if cur is None:
+            return
 
-    conn.commit()
-    cur.close()
-    conn.close()
+        for query in queries:
+            cur.execute(query)
 
 
 # ---------------------------- COUNT FUNCTIONS (FROM SOURCE TABLES) ----------------------------
 
-# **Function to Fetch Last Processed Toekn**
-def last_processed_token():
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return 0  # Return 0 if connection fails
+def _fetch_max_id(query):
+    """
+    Runs a `SELECT MAX(...)` query on DBC_NAME.
+    :return: The max ID (int) or 0 if the table is empty or an error occurs.
+    """
     try:
-        cur = conn.cursor()
-        cur .execute("SELECT MAX(last_processed_id) FROM public.word2vec_training_progress;")
-        max_id = cur.fetchone()[0] or 0  # Ensure None is converted to 0
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return 0  # Return 0 if connection fails
+            cur.execute(query)
+            return cur.fetchone()[0] or 0  # Ensure None is converted to 0
     except Exception as e:
         print(f"❌ Error getting the last post: {e}")
-        max_id = 0
-    finally:
-        cur.close()
-        conn.close()
-
-    return max_id  # Return the max ID or 0 if the table is empty
+        return 0
 
-def last_processed_token_7g():
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return 0  # Return 0 if connection fails
-    try:
-        cur = conn.cursor()
-        cur .execute("SELECT MAX(last_processed_id) FROM public.word2vec_7g_training_progress;")
-        max_id = cur.fetchone()[0] or 0  # Ensure None is converted to 0
-    except Exception as e:
-        print(f"❌ Error getting the last post: {e}")
-        max_id = 0
-    finally:
-        cur.close()
-        conn.close()
 
-    return max_id  # Return the max ID or 0 if the table is empty
+# **Function to Fetch Last Processed Toekn**
+def last_processed_token(progress="word2vec"):
+    """
+    :param progress: Training progress table, by its name in TRAINING_PROGRESS_TABLES
+    :return: The last post_id a trainer saved its model after, 0 if none
+    """
+    return _fetch_max_id(f"SELECT MAX(last_processed_id) FROM public.{TRAINING_PROGRESS_TABLES[progress]};")
 
 # **Function to Fetch Last Processed Post**
 def last_tokenized_post():
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return 0  # Return 0 if connection fails
-    try:
-        cur = conn.cursor()
-        cur .execute("SELECT MAX(post_id) FROM public.tokenized_posts;")
-        max_id = cur.fetchone()[0] or 0  # Ensure None is converted to 0
-    except Exception as e:
-        print(f"❌ Error getting the last post: {e}")
-        max_id = 0
-    finally:
-        cur.close()
-        conn.close()
-
-    return max_id  # Return the max ID or 0 if the table is empty
+    return _fetch_max_id("SELECT MAX(post_id) FROM public.tokenized_posts;")
 
 def last_post():
     """
     Gets the maximum id of posts in the destination table.
     :return: Max ID of posts (int) or 0 if an error occurs.
     """
-
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return 0  # Return 0 if connection fails
-
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT MAX(id) FROM public.stage_posts_cleaned;")
-        max_id = cur.fetchone()[0] or 0  # Ensure None is converted to 0
-    except Exception as e:
-        print(f"❌ Error getting the last post: {e}")
-        max_id = 0
-    finally:
-        cur.close()
-        conn.close()
-
-    return max_id  # Return the max ID or 0 if the table is empty
+    return _fetch_max_id("SELECT MAX(id) FROM public.stage_posts_cleaned;")
 
 
 def count_posts():
@@ -370,57 +523,115 @@ def count_posts():
     Count the number of posts in the Stack Overflow table.
     :return: Total number of posts (int) or None if an error occurs.
     """
-
-    conn = get_connection(DBS_NAME)
-    if not conn:
-        return None
-
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM public.posts_md;")
-        count = cur.fetchone()[0]  # Fetch the count value
+        with db_cursor(DBS_NAME) as cur:
+            if cur is None:
+                return None
+            cur.execute("SELECT COUNT(*) FROM public.posts_md;")
+            return cur.fetchone()[0]  # Fetch the count value
     except Exception as e:
         print(f"❌ Error counting posts: {e}")
-        count = None
-    finally:
-        cur.close()
-        conn.close()
-
-    return count  # Return the total count
+        return None
 
 def count_libraries():
     """
     Counts total NPM packages in the Libraries.io database.
     :return: Total count of NPM packages (int) or None if an error occurs.
     """
-
-    conn = get_connection(DBL_NAME)
-    if not conn:
-        return None
-
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM Projects 
-            WHERE (
-                jsonb_typeof(raw) = 'object' 
-                AND 
-                (SELECT COUNT(*) FROM jsonb_object_keys(raw)) > 1
-            )
-        """)
-        total_packages = cur.fetchone()[0]  # Fetch the count value
+        with db_cursor(DBL_NAME) as cur:
+            if cur is None:
+                return None
+            cur.execute("""
+                SELECT COUNT(*)
+                FROM Projects
+                WHERE (
+                    jsonb_typeof(raw) = 'object'
+                    AND
+                    (SELECT COUNT(*) FROM jsonb_object_keys(raw)) > 1
+                )
+            """)
+            return cur.fetchone()[0]  # Fetch the count value
     except Exception as e:
         print(f"❌ Error counting libraries: {e}")
-        total_packages = None
-    finally:
-        conn.close()
-
-    return total_packages  # Return the total count
+        return None
 
 
 # ---------------------------- INSERTION FUNCTIONS (STORED IN DBC_NAME) ----------------------------
 
+def _copy_value(value):
+    """Formats one value for COPY ... FROM STDIN (text format)."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_into_table(cur, table, columns, data, conflict_column):
+    """
+    Bulk-loads rows with COPY ... FROM STDIN into a temporary (unlogged) copy of `table`,
+    then merges them into `table` with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    :param cur: Cursor of an open DBC_NAME connection
+    :param table: Target table
+    :param columns: Column names, in the order of the values in every row
+    :param data: List of tuples
+    :param conflict_column: Unique column used to skip rows that already exist
+    """
+    temp_table = f"copy_{table}"
+    column_list = ", ".join(columns)
+
+    # Created once per pooled connection and emptied by every commit
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {temp_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;")
+
+    buffer = io.StringIO()
+    for row in data:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cur.copy_expert(f"COPY {temp_table} ({column_list}) FROM STDIN;", buffer)
+    cur.execute(
+        f"""
+        INSERT INTO {table} ({column_list})
+        SELECT {column_list} FROM {temp_table}
+        ON CONFLICT ({conflict_column}) DO NOTHING;
+        """
+    )
+
+
+def _load_rows(table, columns, data, conflict_column):
+    """
+    Writes a batch into `table` in DBC_NAME, with COPY if the table is listed in DB_COPY_TABLES
+    and with execute_values otherwise, and logs the throughput of the batch.
+    """
+    use_copy = table in DB_COPY_TABLES
+    start = time.perf_counter()
+
+    with db_cursor(DBC_NAME) as cur:
+        if cur is None:
+            return
+
+        if use_copy:
+            copy_into_table(cur, table, columns, data, conflict_column)
+        else:
+            execute_values(
+                cur,
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s ON CONFLICT ({conflict_column}) DO NOTHING;",
+                data
+            )
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    logging.info(
+        f"📦 {'COPY' if use_copy else 'INSERT'} {len(data)} rows into {table} "
+        f"in {elapsed:.2f}s ({len(data) / elapsed:,.0f} rows/s)"
+    )
+
+
 def insert_into_stage_posts_cleaned(data):
     """
     Inserts multiple records into stage_posts_cleaned in DBC_NAME.
@@ -429,19 +640,12 @@ def insert_into_stage_posts_cleaned(data):
     if not data:
         return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-
-    cur = conn.cursor()
-    query = """
-    INSERT INTO stage_posts_cleaned (id, posttypeid, title, body, tags, extracted_libraries)
-    VALUES %s ON CONFLICT (id) DO NOTHING;
-    """
-    execute_values(cur, query, data)
-    conn.commit()
-    cur.close()
-    conn.close()
+    _load_rows(
+        "stage_posts_cleaned",
+        ("id", "posttypeid", "title", "body", "tags", "extracted_libraries"),
+        data,
+        "id"
+    )
 
 
 def insert_into_stage_libraries_cleaned(data):
@@ -452,19 +656,12 @@ def insert_into_stage_libraries_cleaned(data):
     if not data:
         return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-
-    cur = conn.cursor()
-    query = """
-    INSERT INTO stage_libraries_cleaned (id, library_name, original_name, platform, description)
-    VALUES %s ON CONFLICT (id) DO NOTHING;
-    """
-    execute_values(cur, query, data)
-    conn.commit()
-    cur.close()
-    conn.close()
+    _load_rows(
+        "stage_libraries_cleaned",
+        ("id", "library_name", "original_name", "platform", "description"),
+        data,
+        "id"
+    )
 
 
 def insert_into_post_library_links(data):
@@ -475,99 +672,140 @@ def insert_into_post_library_links(data):
     if not data:
         return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-
-    cur = conn.cursor()
     query = """
     INSERT INTO post_library_links (post_id, library_id, confidence_score, matching_method)
     VALUES %s ON CONFLICT (post_id, library_id) DO NOTHING;
     """
-    execute_values(cur, query, data)
-    conn.commit()
-    cur.close()
-    conn.close()
-    
+    with db_cursor(DBC_NAME) as cur:
+        if cur is None:
+            return
+        execute_values(cur, query, data)
+
+def _pg_text_array(values):
+    """Formats a list of strings as a PostgreSQL TEXT[] literal ({"a","b"})."""
+    return "{" + ",".join('"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values) + "}"
+
+
 def insert_into_tokenized_posts(data):
     """
     Inserts multiple records into tokenized_posts in DBC_NAME.
+    tokenized_array is written according to TOKENIZED_ARRAY_MODE (JSONB, TEXT[] or not at all).
     :param data: List of tuples (post_id, tokenized_text, tokenized_array)
     """
     if not data:
         return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
+    if TOKENIZED_ARRAY_MODE == "none":
+        columns = ("post_id", "tokenized_text")
+        data = [(post_id, tokenized_text) for post_id, tokenized_text, _ in data]
+    else:
+        columns = ("post_id", "tokenized_text", "tokenized_array")
+        # Convert tokenized_array (list) into JSON or TEXT[] format
+        to_array = _pg_text_array if TOKENIZED_ARRAY_MODE == "text_array" else (lambda tokens: json.dumps(tokens, ensure_ascii=False))
+        data = [
+            (post_id, tokenized_text, to_array(tokenized_array))
+            for post_id, tokenized_text, tokenized_array in data
+        ]
 
-    cur = conn.cursor()
-    query = """
-    INSERT INTO tokenized_posts (post_id, tokenized_text, tokenized_array)
-    VALUES %s ON CONFLICT (post_id) DO NOTHING;
-    """
-    
-    # Convert tokenized_array (list) into JSON format
-    data = [(post_id, tokenized_text, json.dumps(tokenized_array)) for post_id, tokenized_text, tokenized_array in data]
-    
-    execute_values(cur, query, data)
-    conn.commit()
-    cur.close()
-    conn.close()    
+    _load_rows("tokenized_posts", columns, data, "post_id")
 
-def update_last_processed_id(last_id):
-    if not last_id:
-        return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
+def migrate_tokenized_array(mode, vacuum=False):
+    """
+    Converts tokenized_posts.tokenized_array of an existing table to the given storage mode.
+    The arrays are rebuilt from tokenized_text, which holds the same tokens.
+    This rewrites the whole table and locks it while running.
+    :param mode: "jsonb", "text_array" or "none" (drops the column)
+    :param vacuum: Run VACUUM FULL afterwards, to give the freed space back to the OS
+    :return: True if the migration succeeded
+    """
+    if mode not in TOKENIZED_ARRAY_TYPES:
+        print(f"❌ Invalid mode '{mode}'. Use one of: {', '.join(TOKENIZED_ARRAY_TYPES)}")
+        return False
 
-    cur = conn.cursor()
-    cur.execute("INSERT INTO public.word2vec_training_progress (last_processed_id) VALUES (%s);", (last_id,))
-    conn.commit()
-    cur.close()
-    conn.close()  
+    column_type = TOKENIZED_ARRAY_TYPES[mode]
+    new_value = "string_to_array(tokenized_text, ' ')"
+    if mode == "jsonb":
+        new_value = f"to_jsonb({new_value})"
 
+    try:
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return False
+
+            cur.execute("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'tokenized_posts' AND column_name = 'tokenized_array';
+            """)
+            row = cur.fetchone()
+            current_type = row[0] if row else None  # 'jsonb', 'ARRAY' or None
+            logging.info(f"🔄 Migrating tokenized_array from {current_type or 'no column'} to {mode}...")
+
+            if column_type is None:
+                cur.execute("ALTER TABLE public.tokenized_posts DROP COLUMN IF EXISTS tokenized_array;")
+            elif current_type is None:
+                cur.execute(f"ALTER TABLE public.tokenized_posts ADD COLUMN tokenized_array {column_type};")
+                cur.execute(f"UPDATE public.tokenized_posts SET tokenized_array = {new_value};")
+            else:
+                cur.execute(
+                    f"ALTER TABLE public.tokenized_posts ALTER COLUMN tokenized_array TYPE {column_type} USING {new_value};"
+                )
+
+        if vacuum:
+            # VACUUM cannot run inside a transaction block
+            conn = get_connection(DBC_NAME)
+            if conn:
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("VACUUM FULL public.tokenized_posts;")
+                conn.close()
+
+        logging.info(f"✅ tokenized_array migrated to {mode}. Set TOKENIZED_ARRAY_MODE={mode} in .env to match.")
+        return True
+    except Exception as e:
+        logging.error(f"❌ Error migrating tokenized_array: {e}")
+        return False
 
-def update_last_processed_id_7g(last_id):
+def update_last_processed_id(last_id, progress="word2vec"):
+    """Records that a trainer saved its model after `last_id` in its progress table (see TRAINING_PROGRESS_TABLES)."""
     if not last_id:
         return
 
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
+    with db_cursor(DBC_NAME) as cur:
+        if cur is None:
+            return
+        cur.execute(f"INSERT INTO public.{TRAINING_PROGRESS_TABLES[progress]} (last_processed_id) VALUES (%s);", (last_id,))
 
-    cur = conn.cursor()
-    cur.execute("INSERT INTO public.word2vec_7g_training_progress (last_processed_id) VALUES (%s);", (last_id,))
-    conn.commit()
-    cur.close()
-    conn.close()  
+# **Function to Read the Quality Attributes**
+def read_quality_attributes():
+    """:return: List of the quality attributes (e.g. "machine learning"), empty if an error occurs"""
+    try:
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return []
+            cur.execute("SELECT attribute FROM quality_attributes ORDER BY attribute;")
+            return [row[0] for row in cur.fetchall()]
+    except Exception as e:
+        print(f"❌ Error reading the quality attributes: {e}")
+        return []
 
 # **Function to Save Model to Database**
 def save_model_to_db(model, version):
-    conn = get_connection(DBC_NAME)
-    if not conn:
-        return
-
     try:
-        cur = conn.cursor()
-        model_binary = pickle.dumps(model)  # Serialize model
-        cur.execute(
-            "INSERT INTO public.word2vec_models (model_version, model) VALUES (%s, %s);",
-            (version, psycopg2.Binary(model_binary))
-        )
-        conn.commit()
+        with db_cursor(DBC_NAME) as cur:
+            if cur is None:
+                return
+            model_binary = pickle.dumps(model)  # Serialize model
+            cur.execute(
+                "INSERT INTO public.word2vec_models (model_version, model) VALUES (%s, %s);",
+                (version, psycopg2.Binary(model_binary))
+            )
         logging.info(f"✅ Model version {version} saved to database.")
     except Exception as e:
         logging.error(f"❌ Error saving model to DB: {e}")
-    finally:
-        cur.close()
-        conn.close()
-    
+
 # ---------------------------- DATABASE INITIALIZATION FUNCTION ----------------------------
 
 def initialize_staging():
     """Creates staging tables in componentsinsight (DBC_NAME)."""
     create_stage_tables()
-
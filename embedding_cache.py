@@ -0,0 +1,171 @@
+import os
+import sys
+import sqlite3
+import argparse
+import hashlib
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# SQLite file of the cache, best on local disk (SQLite locking is unreliable on network file systems)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite")
+
+# Directory of the per-task caches when several SLURM tasks encode at once (see run_bert_se_job.slurm)
+EMBEDDING_CACHE_TASK_DIR = os.getenv("EMBEDDING_CACHE_TASK_DIR")
+
+LOOKUP_CHUNK = 500  # Keys per SELECT, below SQLite's limit on query parameters
+
+
+def create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            key TEXT PRIMARY KEY,
+            model_name TEXT NOT NULL,
+            text TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL
+        );
+    """)
+    conn.commit()
+
+
+def task_cache_path(task):
+    """Returns the cache file of a SLURM task (SLURM_PROCID) in EMBEDDING_CACHE_TASK_DIR."""
+    return os.path.join(EMBEDDING_CACHE_TASK_DIR, f"embedding_cache_{task}.sqlite")
+
+
+def text_key(model_name, text):
+    """Content address of an embedding: sha256 of the model name and the exact text."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of sentence embeddings in a SQLite file, so repeated
+    evaluation runs (and every model version) only encode texts no run has encoded before.
+    :param model_name: Name of the encoder, part of every key so encoders never share embeddings
+    :param encode: Function encoding a list of texts in one batched call into an array (texts x dim)
+    :param path: SQLite file
+    :param base_path: SQLite file only read (never locked) for the keys missing from `path`, e.g. the shared
+                      cache while parallel tasks each write their own file, merged into it afterwards
+    """
+
+    def __init__(self, model_name, encode, path=EMBEDDING_CACHE_PATH, base_path=None):
+        self.model_name = model_name
+        self._encode = encode
+        self.path = path
+        self.hits = self.misses = 0
+
+        self.conn = sqlite3.connect(path, timeout=60, uri=True)
+        create_table(self.conn)
+        self.base_path = base_path if base_path and os.path.exists(base_path) else None
+        if self.base_path:
+            self.conn.execute("ATTACH DATABASE ? AS base;",
+                              (f"file:{os.path.abspath(self.base_path)}?mode=ro&immutable=1",))
+
+    def close(self):
+        self.conn.close()
+
+    def lookup(self, keys):
+        """:return: Dict of key -> float32 vector for the keys in the cache (or in the base cache)"""
+        found = self._select("main", keys)
+        if self.base_path:
+            found.update(self._select("base", [key for key in keys if key not in found]))
+        return found
+
+    def _select(self, database, keys):
+        found = {}
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM {database}.embeddings WHERE key IN ({','.join('?' * len(chunk))});", chunk
+            )
+            found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        return found
+
+    def encode(self, texts):
+        """
+        Returns the embeddings of `texts`, encoding only the distinct texts missing from the cache
+        (in one batched call) and storing them.
+        :return: float32 array (len(texts) x dim), in the order of `texts`
+        """
+        keys = [text_key(self.model_name, text) for text in texts]
+        vectors = self.lookup(list(set(keys)))
+
+        missing = list({key: text for key, text in zip(keys, texts) if key not in vectors}.items())
+        self.hits += sum(1 for key in keys if key in vectors)
+        self.misses += len(missing)
+
+        if missing:
+            encoded = np.asarray(self._encode([text for _, text in missing]), dtype=np.float32)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, model_name, text, dim, vector) VALUES (?, ?, ?, ?, ?);",
+                [(key, self.model_name, text, vector.shape[0], vector.tobytes())
+                 for (key, text), vector in zip(missing, encoded)],
+            )
+            self.conn.commit()
+            vectors.update((key, vector) for (key, _), vector in zip(missing, encoded))
+
+        return np.stack([vectors[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+    def similarities(self, query, texts):
+        """
+        Cosine similarity of `query` with every text, from one batched lookup/encode of all of them.
+        :return: List of floats, in the order of `texts`
+        """
+        embeddings = self.encode([query] + list(texts)).astype(np.float64)
+        norms = np.linalg.norm(embeddings, axis=1)
+        norms[norms == 0] = 1.0
+        embeddings = embeddings / norms[:, None]
+        return (embeddings[1:] @ embeddings[0]).tolist()
+
+    def log_stats(self):
+        """Prints how many texts were served from the cache and how many had to be encoded."""
+        total = self.hits + self.misses
+        if total:
+            print(f"📊 Embedding cache: {self.hits}/{total} texts cached ({self.hits / total:.1%}), "
+                  f"{self.misses} encoded.", flush=True)
+
+
+# **Function to Merge Cache Files (e.g. those of parallel SLURM tasks) into One**
+def merge_caches(sources, target=EMBEDDING_CACHE_PATH):
+    """
+    Copies the embeddings of every source file missing from `target`. Run it from one process only:
+    `target` is the file the tasks did not write to.
+    :return: Number of embeddings added
+    """
+    conn = sqlite3.connect(target, timeout=60)
+    create_table(conn)
+    added = 0
+    for source in sources:
+        conn.execute("ATTACH DATABASE ? AS source;", (source,))
+        count = conn.execute("INSERT OR IGNORE INTO embeddings SELECT * FROM source.embeddings;").rowcount
+        conn.commit()
+        conn.execute("DETACH DATABASE source;")
+        print(f"✅ Merged {count} new embeddings from {source}.", flush=True)
+        added += count
+    conn.close()
+    return added
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Merge embedding cache files into the shared cache.")
+    parser.add_argument("sources", type=str, nargs="+", help="Cache files to merge (missing files are skipped)")
+    parser.add_argument("--into", type=str, default=EMBEDDING_CACHE_PATH,
+                        help=f"Cache to merge them into (default: {EMBEDDING_CACHE_PATH})")
+    args = parser.parse_args()
+
+    sources = [source for source in args.sources if os.path.exists(source)]
+    try:
+        added = merge_caches(sources, args.into)
+    except sqlite3.Error as e:
+        print(f"❌ Error merging the embedding caches into {args.into}: {e}", flush=True)
+        sys.exit(1)
+    print(f"✅ {added} embeddings merged into {args.into}.", flush=True)
+
+
+if __name__ == "__main__":
+    main()
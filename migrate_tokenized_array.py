@@ -0,0 +1,24 @@
+import sys
+import argparse
+from database import TOKENIZED_ARRAY_TYPES, migrate_tokenized_array
+
+
+def main():
+    """
+    Converts the tokenized_array column of an existing tokenized_posts table.
+    Usage:
+        python migrate_tokenized_array.py none --vacuum  -> Drops the column and reclaims its space
+        python migrate_tokenized_array.py text_array     -> Converts the JSONB arrays to TEXT[]
+    Then set TOKENIZED_ARRAY_MODE to the same mode in .env.
+    """
+    parser = argparse.ArgumentParser(description="Change how tokenized_posts.tokenized_array is stored.")
+    parser.add_argument("mode", choices=list(TOKENIZED_ARRAY_TYPES), help="New storage mode of tokenized_array")
+    parser.add_argument("--vacuum", action="store_true", help="Run VACUUM FULL afterwards to reclaim disk space")
+    args = parser.parse_args()
+
+    if not migrate_tokenized_array(args.mode, vacuum=args.vacuum):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from multiprocessing import Pool
+
+
+def available_cpus():
+    """
+    Number of CPUs this job may use: SLURM_CPUS_PER_TASK inside a SLURM job,
+    the CPUs of the machine otherwise.
+    """
+    slurm_cpus = os.getenv("SLURM_CPUS_PER_TASK")
+    if slurm_cpus and slurm_cpus.isdigit():
+        return int(slurm_cpus)
+    return os.cpu_count() or 1
+
+
+def ordered_pool_map(func, batches, workers, initializer=None, initargs=(), max_pending=None):
+    """
+    Applies `func` to every batch on a process pool and yields the results in input order,
+    so a writer can store them in id order and id-based resume keeps working.
+    At most `max_pending` batches are in flight, so the reader never runs far ahead of the writer.
+    :param func: Picklable module-level function taking one batch
+    :param batches: Iterable of batches, consumed lazily in the calling process
+    :param workers: Number of worker processes
+    :param initializer: Optional function run once in every worker when it starts
+    :param initargs: Arguments for `initializer`
+    :param max_pending: Maximum number of submitted batches not yet yielded (default: 2 per worker)
+    :yield: func(batch) for every batch, in the order of `batches`
+    """
+    max_pending = max_pending or 2 * workers
+
+    with Pool(processes=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+
+        for batch in batches:
+            pending.append(pool.apply_async(func, (batch,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()  # Oldest batch first, keeps the output ordered
+
+        while pending:
+            yield pending.popleft().get()
+
+
+class Prefetcher:
+    """
+    Iterates `iterable` on a background thread, up to `depth` items ahead of the consumer, so fetching
+    (and `transform`, e.g. preprocessing) the next batches overlaps with the work on the current one.
+    Exceptions of the producer are raised in the consumer. Tracks how long each side waited:
+    the consumer waiting means the input (I/O) is the bottleneck, the producer waiting means the compute is.
+    :param iterable: Items to prefetch, consumed on the background thread
+    :param depth: Maximum number of prefetched items waiting in the queue
+    :param transform: Optional function applied to every item on the background thread
+    :param log_every: Log the queue statistics every this many items (0: only at the end)
+    """
+
+    _DONE = object()
+
+    def __init__(self, iterable, depth=2, transform=None, log_every=10):
+        self.iterable = iterable
+        self.depth = max(1, depth)
+        self.transform = transform
+        self.log_every = log_every
+
+        self.items = 0
+        self.consumer_wait = 0.0  # Seconds the consumer waited for the next item (input-bound)
+        self.producer_wait = 0.0  # Seconds the producer waited for a free queue slot (compute-bound)
+        self.depth_sum = 0  # Sum of the queue depths seen by the consumer
+
+    def __iter__(self):
+        items = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(items, stop), name="prefetcher", daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                depth = items.qsize()
+                start = time.perf_counter()
+                item = items.get()
+                self.consumer_wait += time.perf_counter() - start
+
+                if item is self._DONE:
+                    break
+                if isinstance(item, _ProducerError):
+                    raise item.error
+
+                self.items += 1
+                self.depth_sum += depth
+                if self.log_every and self.items % self.log_every == 0:
+                    self.log_stats()
+                yield item
+        finally:
+            stop.set()  # Lets a producer blocked on a full queue exit when the consumer stops early
+            thread.join(timeout=1)
+            if not self.log_every or self.items % self.log_every:
+                self.log_stats()
+
+    def _produce(self, items, stop):
+        try:
+            for item in self.iterable:
+                if self.transform:
+                    item = self.transform(item)
+                if not self._put(items, item, stop):
+                    return
+            self._put(items, self._DONE, stop)
+        except Exception as e:
+            self._put(items, _ProducerError(e), stop)
+
+    def _put(self, items, item, stop):
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                self.producer_wait += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def log_stats(self):
+        """Logs the average queue depth and the time each side waited for the other."""
+        if not self.items:
+            return
+        bound = "input-bound" if self.consumer_wait > self.producer_wait else "compute-bound"
+        logging.info(
+            f"📊 Prefetch: {self.items} items, avg queue depth {self.depth_sum / self.items:.1f}/{self.depth}, "
+            f"waited on input {self.consumer_wait:.1f}s, on compute {self.producer_wait:.1f}s ({bound})."
+        )
+
+
+class _ProducerError:
+    """Wraps an exception of the prefetch thread, to raise it in the consumer."""
+
+    def __init__(self, error):
+        self.error = error
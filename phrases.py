@@ -0,0 +1,138 @@
+import os
+import sys
+import logging
+import argparse
+from gensim import utils
+from gensim.models.phrases import Phrases
+from corpus import PostgresCorpus, PhrasedCorpus, ShardedCorpus, MANIFEST_FILE
+
+# Phrase detection defaults: NPMI scores are in [-1, 1] whatever the corpus size
+MIN_COUNT = 10
+THRESHOLD = 0.5
+SCORING = "npmi"
+LAYERS = 3  # Every layer can join two terms of the previous one: 3 layers detect terms of up to 8 words
+
+# gensim splits phrases on their delimiter when freezing them, so every layer joins with its own
+# ASCII separator (never part of a token) and the detected phrases are rewritten with "_" at the end
+LAYER_DELIMITERS = ("_", "\x1f", "\x1e", "\x1d", "\x1c")
+NORMALIZE_DELIMITERS = str.maketrans({delimiter: "_" for delimiter in LAYER_DELIMITERS[1:]})
+
+PHRASES_EXTENSION = ".phrases"
+
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+
+def phrases_path(model_path):
+    """Returns where the phrase detector of a Word2Vec model is stored: next to it, with a .phrases extension."""
+    return os.path.splitext(model_path)[0] + PHRASES_EXTENSION
+
+
+class PhraseDetector(utils.SaveLoad):
+    """
+    Stack of frozen gensim phrase layers learned from co-occurrence statistics.
+    Layer k runs on the output of layer k-1, so "machine learning model" can become
+    "machine_learning" + "model" and then "machine_learning_model" if that scores high enough.
+    phraser[sentence] maps a list of words to the list of words and detected phrases.
+    :param layers: List of gensim FrozenPhrases
+    """
+
+    def __init__(self, layers=()):
+        self.layers = list(layers)
+
+    def __getitem__(self, sentence):
+        sentence = self._transform(sentence)
+        if len(self.layers) > 1:
+            sentence = [token.translate(NORMALIZE_DELIMITERS) for token in sentence]
+        return sentence
+
+    def _transform(self, sentence):
+        """Applies the layers learned so far, keeping the per-layer delimiters (used while learning)."""
+        for layer in self.layers:
+            sentence = layer[sentence]
+        return sentence
+
+    @classmethod
+    def learn(cls, corpus, layers=LAYERS, min_count=MIN_COUNT, threshold=THRESHOLD, scoring=SCORING):
+        """
+        Learns the phrase layers, one streaming pass over the corpus per layer.
+        :param corpus: Re-iterable of tokenized sentences (e.g. PostgresCorpus or ShardedCorpus)
+        :param layers: Number of layers, at most len(LAYER_DELIMITERS)
+        :return: PhraseDetector
+        """
+        if not 1 <= layers <= len(LAYER_DELIMITERS):
+            raise ValueError(f"❌ The number of phrase layers must be between 1 and {len(LAYER_DELIMITERS)}.")
+
+        detector = cls()
+        learning = PhrasedCorpus(corpus, _LearningView(detector))
+        for layer in range(layers):
+            logging.info(f"🔄 Learning phrase layer {layer + 1}/{layers}...")
+            phrases = Phrases(learning, min_count=min_count, threshold=threshold, scoring=scoring,
+                              delimiter=LAYER_DELIMITERS[layer])
+            detector.layers.append(phrases.freeze())
+            logging.info(f"✅ Layer {layer + 1}: {len(detector.layers[-1].phrasegrams)} phrases.")
+        return detector
+
+
+class _LearningView:
+    """phraser[sentence] view of a PhraseDetector that keeps the per-layer delimiters."""
+
+    def __init__(self, detector):
+        self.detector = detector
+
+    def __getitem__(self, sentence):
+        return self.detector._transform(sentence)
+
+
+# **Function to Load the Phrase Detector of a Model, Learning it Once if Missing**
+def load_or_learn_phraser(model_path, corpus):
+    """
+    Loads the phrase detector stored next to `model_path`, or learns it from `corpus` and saves it there.
+    :return: PhraseDetector
+    """
+    path = phrases_path(model_path)
+    if os.path.exists(path):
+        logging.info(f"🔄 Loading phrase detector from {path}...")
+        return PhraseDetector.load(path)
+
+    logging.info("🆕 Learning the phrase detector over the tokenized corpus...")
+    detector = PhraseDetector.learn(corpus)
+    detector.save(path)
+    logging.info(f"💾 Phrase detector saved to {path}.")
+    return detector
+
+
+# **Function to Load the Phrase Detector of a Model if There is One**
+def load_phraser(model_path):
+    """
+    :return: The PhraseDetector stored next to `model_path`, or None if the model was not trained with one
+    """
+    path = phrases_path(model_path)
+    return PhraseDetector.load(path) if os.path.exists(path) else None
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Learn the phrase detector of a Word2Vec model ahead of training.")
+    parser.add_argument("model", type=str, help="Word2Vec model path, the detector is saved next to it")
+    parser.add_argument("--sentences", type=str, default=None,
+                        help="Sharded sentence directory (11_export_sentences.py) instead of reading tokenized_posts")
+    parser.add_argument("--layers", type=int, default=LAYERS, help=f"Phrase layers (default: {LAYERS})")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT, help=f"Minimum phrase count (default: {MIN_COUNT})")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"NPMI score threshold (default: {THRESHOLD})")
+    args = parser.parse_args()
+
+    if args.sentences:
+        if not os.path.exists(os.path.join(args.sentences, MANIFEST_FILE)):
+            print(f"❌ No {MANIFEST_FILE} in {args.sentences}", flush=True)
+            sys.exit(1)
+        corpus = ShardedCorpus(args.sentences)
+    else:
+        corpus = PostgresCorpus()
+
+    detector = PhraseDetector.learn(corpus, layers=args.layers, min_count=args.min_count, threshold=args.threshold)
+    detector.save(phrases_path(args.model))
+    print(f"✅ Phrase detector saved to {phrases_path(args.model)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
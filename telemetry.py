@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import socket
+import resource
+import threading
+from contextlib import contextmanager
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = "word2vec_training"
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process so far (ru_maxrss is in KiB on Linux, in bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Telemetry:
+    """
+    Training telemetry: time spent per stage (fetch, phrases, vocab, train, save, ...), rows and words
+    trained, words/sec and peak RSS, emitted as one JSON object per line (on stdout, so they end up in the
+    SLURM log, and/or appended to a file) and optionally written as a Prometheus textfile-collector file.
+    Stage times are cumulative; stages timed on a background thread (e.g. the prefetcher) overlap with the others.
+    :param job: Name of the run, added to every record and metric (e.g. the model path)
+    :param json_path: Also append the JSON lines to this file
+    :param prometheus_path: Rewrite this .prom file on every emit (node_exporter textfile collector)
+    :param every_seconds: Minimum seconds between two emits of maybe_emit() (0: every call)
+    :param stdout: Print the JSON lines on stdout
+    """
+
+    def __init__(self, job, json_path=None, prometheus_path=None, every_seconds=60, stdout=True):
+        self.job = job
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.every_seconds = every_seconds
+        self.stdout = stdout
+
+        self.stages = {}  # Stage -> cumulative seconds
+        self.counters = {"rows": 0, "words": 0, "raw_words": 0, "batches": 0}
+        self.started = time.time()
+        self.last_emit = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def timed(self, name, iterable):
+        """Yields the items of `iterable`, timing every next() as stage `name` (e.g. the database fetch)."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add_time(name, time.perf_counter() - start)
+            yield item
+
+    def count(self, **counts):
+        """Adds to the counters, e.g. count(rows=len(sentences), batches=1)."""
+        with self._lock:
+            for key, value in counts.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def count_training(self, result, rows=0):
+        """Adds the (trained words, raw words) returned by model.train() and the rows trained."""
+        if result:
+            self.count(words=result[0], raw_words=result[1])
+        self.count(rows=rows)
+
+    def snapshot(self, event="progress", **fields):
+        """:return: The current record: stage seconds, counters, words/sec and peak RSS"""
+        with self._lock:
+            stages = dict(self.stages)
+            counters = dict(self.counters)
+        train_seconds = stages.get("train", 0.0)
+        elapsed = time.time() - self.started
+        return {
+            "event": event,
+            "job": self.job,
+            "host": socket.gethostname(),
+            "slurm_job_id": os.getenv("SLURM_JOB_ID"),
+            "time": round(time.time(), 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "stage_seconds": {name: round(seconds, 3) for name, seconds in sorted(stages.items())},
+            **counters,
+            "words_per_second": round(counters["words"] / train_seconds, 1) if train_seconds else 0.0,
+            "rows_per_second": round(counters["rows"] / elapsed, 1) if elapsed else 0.0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            **fields,
+        }
+
+    def maybe_emit(self, **fields):
+        """Emits a progress record if `every_seconds` have passed since the last one."""
+        if time.perf_counter() - self.last_emit >= self.every_seconds:
+            self.emit(**fields)
+
+    def emit(self, event="progress", **fields):
+        """Writes the current record as a JSON line (and the Prometheus file)."""
+        self.last_emit = time.perf_counter()
+        record = self.snapshot(event, **fields)
+        line = json.dumps(record)
+        if self.stdout:
+            print(line, flush=True)
+        if self.json_path:
+            with open(self.json_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        if self.prometheus_path:
+            self.write_prometheus(record)
+        return record
+
+    def write_prometheus(self, record):
+        """Rewrites the Prometheus text file atomically (temp file + rename), as the textfile collector expects."""
+        labels = f'job="{self.job}"'
+        lines = [
+            f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+            *(f'{METRIC_PREFIX}_stage_seconds_total{{{labels},stage="{name}"}} {seconds}'
+              for name, seconds in record["stage_seconds"].items()),
+        ]
+        for key in ("rows", "words", "raw_words", "batches"):
+            lines += [f"# TYPE {METRIC_PREFIX}_{key}_total counter", f"{METRIC_PREFIX}_{key}_total{{{labels}}} {record[key]}"]
+        for key in ("words_per_second", "rows_per_second", "peak_rss_bytes", "elapsed_seconds"):
+            lines += [f"# TYPE {METRIC_PREFIX}_{key} gauge", f"{METRIC_PREFIX}_{key}{{{labels}}} {record[key]}"]
+
+        tmp_path = self.prometheus_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_path)
@@ -0,0 +1,182 @@
+import re
+import html
+
+
+# Package manager commands whose first argument is a library name
+PACKAGE_MANAGERS = {
+    "PureScript": ["pulp dep install"],
+    "Objective-C": ["pod install", "carthage update"],
+    "C++": ["vcpkg install", "conan install"],
+    "JavaScript": ["npm install", "yarn add", "bower install", "meteor add"],
+    "Java": ["mvn install", "gradle dependencies"],
+    "Python": ["pip install", "conda install"],
+    "C#": ["dotnet add package", "nuget install"],
+    "PHP": ["composer require"],
+    "Ruby": ["gem install", "bundle add"],
+    "Rust": ["cargo install", "cargo add"],
+    "CSS": ["bower install"],
+    "Dart": ["pub add"],
+    "Perl": ["cpan install"],
+    "R": ["install.packages"],
+    "Clojure": ["clojure -Sdeps"],
+    "Elixir": ["mix deps.get"],
+    "C": ["vcpkg install", "conan install"],
+    "Puppet": ["puppet module install"],
+    "Swift": ["swift package add", "pod install", "carthage update"],
+    "Julia": ["Pkg.add"],
+    "Elm": ["elm install"],
+    "D": ["dub add"],
+    "Nim": ["nimble install"],
+    "Haxe": ["haxelib install"],
+    "Go": ["go get"]
+}
+
+# Install commands of all package managers, without duplicates
+INSTALL_COMMANDS = list(dict.fromkeys(cmd for commands in PACKAGE_MANAGERS.values() for cmd in commands))
+
+# List of programming variable names to ignore
+COMMON_VARIABLES = frozenset({"i", "x", "y", "z", "data", "query", "item", "row", "col", "temp", "val"})
+
+
+def trie_regex(words):
+    """
+    Builds a regex alternation matching any of `words`, factored by common prefixes
+    (e.g. "cargo install", "cargo add" -> "cargo\\ (?:add|install)"), so each shared
+    prefix is tested once instead of once per word.
+    :param words: Literal strings to match
+    :return: Regex pattern (string) without anchors or groups
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of word marker
+
+    def to_regex(node):
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        is_word_end = "" in node
+        if len(branches) == 1 and not is_word_end:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if is_word_end else "")
+
+    return to_regex(trie)
+
+
+class TextCleaner:
+    """
+    Cleans Stack Overflow markdown and extracts library names from code.
+    Every pattern is compiled once, when this module is imported, and reused for every post.
+    """
+
+    # Markdown
+    CODE_BLOCK_RE = re.compile(r'```[\s\S]*?```')
+    LINK_RE = re.compile(r'\[([^\]]+)\]\((https?:\/\/[^\s]+)\)')
+    IMAGE_RE = re.compile(r'!\[.*?\]\(.*?\)')
+    INLINE_CODE_RE = re.compile(r'`([^`]*)`')
+    MENTION_RE = re.compile(r'@\w+')
+    MARKDOWN_CHARS = str.maketrans("", "", "#*_>~-")  # Deletes #, *, _, >, ~, -
+
+    # Library extraction
+    CODE_SPAN_RE = re.compile(r'`{1,3}(.*?)`{1,3}', re.DOTALL)
+    INSTALL_RE = re.compile(
+        r'\b(?:' + trie_regex(INSTALL_COMMANDS) + r')\s+["\']?([a-zA-Z0-9._-]+)["\']?',
+        re.IGNORECASE
+    )
+    # "import x", "require x", "include <x>", "using x" and Python's "from x import y", at the start of a block
+    IMPORT_RE = re.compile(
+        r'\s*(?:(?:import|require|include|using)\s+["\'<]?([a-zA-Z0-9._-]+)|from\s+([a-zA-Z0-9._-]+)\s+import\s)',
+        re.IGNORECASE
+    )
+
+    # HTML and library names
+    HTML_TAG_RE = re.compile(r'<[^>]+>')
+    NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+    def clean_markdown(self, text, preserve_inline_code=True):
+        """
+        Cleans Markdown text by:
+        - Removing multi-line code blocks (```code```)
+        - Removing links and images
+        - Optionally keeping or removing inline code (`code`)
+        - Removing all other Markdown formatting
+        :param text: Markdown-formatted text
+        :param preserve_inline_code: If True, keeps text inside single backticks (`example`)
+        :return: Cleaned text without Markdown formatting
+        """
+        if not text:
+            return None
+
+        # The substring checks skip passes that cannot match anything, which is the case for most posts
+        if "```" in text:
+            text = self.CODE_BLOCK_RE.sub('', text)
+
+        if "](" in text:
+            text = self.LINK_RE.sub(r'\1', text)  # Keep link text, remove URL
+            text = self.IMAGE_RE.sub('', text)
+
+        if "`" in text:
+            text = self.INLINE_CODE_RE.sub(r'\1' if preserve_inline_code else '', text)
+
+        # Remove remaining Markdown formatting and normalize whitespace, in two C-level passes
+        text = " ".join(text.translate(self.MARKDOWN_CHARS).split()).lower()
+
+        if "@" in text:
+            text = self.MENTION_RE.sub('', text)
+
+        return text
+
+    def extract_libraries_from_code(self, text):
+        """
+        Extracts possible library mentions from Markdown code blocks.
+        - Captures library names from import, require, and package manager install commands.
+        - Detect C/C++ headers (#include <sys/socket.h>).
+        :param text: Markdown-formatted body text
+        :return: Comma-separated string of extracted libraries, or None if nothing is found
+        """
+        if not text or "`" not in text:
+            return None
+
+        libraries = {}  # Ordered set
+        for block in self.CODE_SPAN_RE.findall(text):
+            matches = self.INSTALL_RE.findall(block)
+
+            import_match = self.IMPORT_RE.match(block)
+            if import_match:
+                matches.append(import_match.group(1) or import_match.group(2))
+
+            for match in matches:
+                # Ensure it's not a common variable name
+                if match not in COMMON_VARIABLES:
+                    libraries[match] = None
+
+        return ', '.join(libraries) if libraries else None
+
+    def clean_html(self, text):
+        if text:
+            text = html.unescape(text)  # Decode HTML entities
+            text = self.HTML_TAG_RE.sub('', text)  # Remove HTML tags
+            text = " ".join(text.split())  # Normalize whitespace
+        return text.lower() if text else None
+
+    def normalize_library_name(self, name):
+        if name:
+            name = name.lower()
+            name = self.NON_ALNUM_RE.sub('-', name)  # Replace special chars with '-'
+            name = name.strip('-')
+        return name
+
+    def remove_mentions(self, text):
+        return self.MENTION_RE.sub('', text)
+
+
+# Shared cleaner used by the module-level functions (and by every worker process)
+CLEANER = TextCleaner()
+
+clean_markdown = CLEANER.clean_markdown
+extract_libraries_from_code = CLEANER.extract_libraries_from_code
+clean_html = CLEANER.clean_html
+normalize_library_name = CLEANER.normalize_library_name
+remove_mentions = CLEANER.remove_mentions
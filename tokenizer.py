@@ -0,0 +1,157 @@
+import os
+import re
+import sys
+import argparse
+import nltk
+from dotenv import load_dotenv
+
+# Load environment variables from .env
+load_dotenv()
+
+# Local directory with the NLTK data, downloaded once with `python tokenizer.py --download`
+NLTK_DATA_DIR = os.path.abspath(os.getenv("NLTK_DATA_DIR", "./nltk_data"))
+
+# NLTK packages used by the tokenizer, and where NLTK looks for them
+NLTK_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+
+# Tokenizer backends and the NLTK packages each one needs
+BACKENDS = {
+    "nltk": ("punkt_tab", "stopwords"),  # NLTK word_tokenize (Punkt + Treebank)
+    "regex": ("stopwords",),  # Compiled regex approximating word_tokenize
+}
+
+# Characters word_tokenize splits tokens on
+TOKEN_SEPARATORS = r"\s,;:@#$%&?!()\[\]{}<>\"'`"
+
+# A token is a run of non-separators. Like word_tokenize, a period only stays inside a token
+# ("node.js", "3.14"), commas/colons only stay between digits ("1,000", "10:30") and an apostrophe
+# only stays inside a word when it does not start a clitic ("o'neil", but "it 's", "we 'll")
+REGEX_TOKEN_RE = re.compile(
+    rf"(?:[^{TOKEN_SEPARATORS}.]|\.(?=[^{TOKEN_SEPARATORS}.])|[,:](?=\d)|(?<=\w)'(?=\w)(?!(?:s|m|d|ll|re|ve)\b))+"
+)
+
+# Contractions word_tokenize splits: "can't" -> "ca n't", "cannot" -> "can not", "gonna" -> "gon na", ...
+CONTRACTIONS_RE = re.compile(r"(?<=\w)n't\b|\b(?:can(?=not\b)|gim(?=me\b)|lem(?=me\b)|gon(?=na\b)|wan(?=na\b)|got(?=ta\b))")
+
+
+def _split_contraction(match):
+    return " " if match.group().endswith("'t") else match.group() + " "
+
+
+if NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+
+def download_nltk_data():
+    """
+    Downloads the NLTK packages into NLTK_DATA_DIR (needs network access).
+    :return: True if every package was downloaded
+    """
+    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+    failed = [package for package in NLTK_RESOURCES if not nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)]
+
+    if failed:
+        print(f"❌ Could not download NLTK data {', '.join(failed)} to {NLTK_DATA_DIR}", flush=True)
+        return False
+
+    print(f"✅ NLTK data downloaded to {NLTK_DATA_DIR}", flush=True)
+    return True
+
+
+def ensure_nltk_data(packages=tuple(NLTK_RESOURCES)):
+    """
+    Checks that the NLTK packages are available locally, without touching the network.
+    :param packages: Names of the packages to check (default: all of NLTK_RESOURCES)
+    :raises LookupError: If a package is missing
+    """
+    missing = []
+    for package in packages:
+        try:
+            nltk.data.find(NLTK_RESOURCES[package])
+        except LookupError:
+            missing.append(package)
+
+    if missing:
+        raise LookupError(
+            f"❌ Missing NLTK data {', '.join(missing)} in {NLTK_DATA_DIR}. "
+            f"Run `python tokenizer.py --download` once on a machine with network access."
+        )
+
+
+_stop_words = None  # Loaded once per process
+
+
+def english_stop_words():
+    """Returns the English stopwords as a frozenset, reading them only once per process."""
+    global _stop_words
+    if _stop_words is None:
+        from nltk.corpus import stopwords
+        _stop_words = frozenset(stopwords.words("english"))
+    return _stop_words
+
+
+class Tokenizer:
+    """
+    Reusable post tokenizer: resolves the NLTK data once, keeps a frozen stopword set
+    and can be shared across batches or sent to worker processes.
+    :param backend: "nltk" for NLTK word_tokenize, or "regex" for the much faster compiled-regex
+                    tokenizer (only alphanumeric tokens are kept anyway, see benchmark_tokenizer.py
+                    for how far both outputs differ)
+    """
+
+    def __init__(self, backend="nltk"):
+        if backend not in BACKENDS:
+            raise ValueError(f"❌ Unknown tokenizer backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+        ensure_nltk_data(BACKENDS[backend])
+
+        self.backend = backend
+        self.stop_words = english_stop_words()
+
+        if backend == "nltk":
+            from nltk.tokenize import word_tokenize
+            self._split = word_tokenize
+            self._split("warm up")  # Loads the Punkt model now instead of on the first post
+        else:
+            self._split = self.regex_split
+
+    def __reduce__(self):
+        # Worker processes rebuild the tokenizer from their own NLTK data instead of unpickling it
+        return (self.__class__, (self.backend,))
+
+    @staticmethod
+    def regex_split(text):
+        """Splits text into word_tokenize-like tokens with two compiled regex passes."""
+        return REGEX_TOKEN_RE.findall(CONTRACTIONS_RE.sub(_split_contraction, text))
+
+    def tokenize(self, text):
+        """
+        Tokenizes text by:
+        - Lowercasing
+        - Removing non-alphanumeric words
+        - Removing stopwords
+        :return: List of tokens
+        """
+        tokens = self._split(text.lower())  # Tokenize after converting to lowercase
+        return [word for word in tokens if word.isalnum() and word not in self.stop_words]  # Remove stopwords
+
+    def preprocess(self, title, body):
+        """
+        Tokenizes a post, combining title + body for better representation.
+        :return: Space-separated tokens and the list of tokens
+        """
+        tokens = self.tokenize(f"{title} {body}")  # Concatenating title and body
+        return " ".join(tokens), tokens  # Store as space-separated text and Return both formats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local NLTK data used by the tokenizer.")
+    parser.add_argument("--download", action="store_true", help=f"Download the NLTK data into {NLTK_DATA_DIR}")
+    args = parser.parse_args()
+
+    if args.download and not download_nltk_data():
+        sys.exit(1)
+    ensure_nltk_data()
+    print(f"✅ NLTK data found in {NLTK_DATA_DIR}", flush=True)
@@ -0,0 +1,129 @@
+import os
+import yaml
+from gensim.models import Word2Vec
+from corpus import PhraseCorpus, PhrasedCorpus, PostgresCorpus, load_sentences
+from parallel import available_cpus
+from phrases import load_or_learn_phraser
+
+# Default configuration, overridden by the --config file and then by every --set KEY=VALUE
+DEFAULT_CONFIG = {
+    # Model
+    "model_path": "stackoverflow_word2vec.model",
+    "vector_size": 200,
+    "window": 5,
+    "min_count": 10,
+    "workers": "auto",  # Training threads, "auto" = SLURM_CPUS_PER_TASK (or the machine's CPUs)
+    "epochs": 5,
+    "seed": 1,  # Seed of the initial vectors, shared by all the shards of a sharded run
+
+    # Training: "batches" updates the vocabulary and trains on every batch of posts (resumes by post_id),
+    # "streaming" builds the vocabulary once and trains whole epochs over the corpus (resumes by epoch)
+    "mode": "batches",
+    "alpha": "gensim",  # batches mode: "gensim" (decay restarts every batch) or "carry" (kept across batches)
+    "phrases": "none",  # "none", "ngrams" (every 2- to phrase_length-gram) or "learned" (see phrases.py)
+    "phrase_length": 7,
+
+    # Corpus: "postgres" (tokenized_posts) or "files" (sentences written by 11_export_sentences.py)
+    "source": "postgres",
+    "sentences": "./sentences",
+    "batch_size": 10000,
+    "prefetch": 2,  # batches mode: batches fetched and preprocessed ahead of training (0: no prefetching)
+
+    # Telemetry (see telemetry.py): JSON lines with the time per stage, words/sec and peak RSS on stdout
+    "telemetry_seconds": 60,  # Seconds between two records (0: after every batch)
+    "telemetry_file": None,  # Also append the records to this file
+    "prometheus_file": None,  # Also write the metrics to this .prom file (node_exporter textfile collector)
+
+    # batches mode
+    "progress": "word2vec",  # Progress table, see TRAINING_PROGRESS_TABLES in database.py
+    "versions_dir": "./versions",
+    "version_suffix": "_MV",
+    "version_every": 1000000,  # A KeyedVectors snapshot (.kv, see vectors.py) is kept every this many post_ids
+    "version_float16": False,  # Store the snapshot vectors as float16 (half the disk, not memory-mapped)
+    "checkpoint_rows": None,  # Background checkpoint after this many rows ...
+    "checkpoint_seconds": 600,  # ... or this many seconds (both null: after every batch)
+    "prune_every_rows": None,  # Prune the vocabulary after this many rows (null: never), with:
+    "prune_max_vocab_size": None,  # - at most this many words, the most frequent ones
+    "prune_min_count": None,  # - words seen fewer times than this dropped
+    "prune_ngram_min_count": None,  # - n-grams seen fewer times than this dropped
+
+    # streaming and sharded modes
+    "count_workers": "auto",  # Processes of the vocabulary counting pass
+    "max_vocab_size": None,
+    "queue_factor": 2,
+
+    # sharded mode (12_sharded_word2vec.py): the corpus is split into `shards` id ranges trained separately
+    # on a shared vocabulary and averaged; "auto" = SLURM_NTASKS (or 1)
+    "shards": "auto",
+    "shard_dir": "./shards",
+}
+
+CHOICES = {
+    "mode": ("batches", "streaming", "sharded"),
+    "alpha": ("gensim", "carry"),
+    "phrases": ("none", "ngrams", "learned"),
+    "source": ("postgres", "files"),
+}
+
+
+# **Function to Load the Training Configuration**
+def load_config(path=None, overrides=()):
+    """
+    Merges the defaults, the YAML file and the KEY=VALUE overrides (values are parsed as YAML).
+    :raises ValueError: On unknown keys or invalid values
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(yaml.safe_load(f) or {})
+
+    for override in overrides:
+        key, separator, value = override.partition("=")
+        if not separator:
+            raise ValueError(f"❌ Invalid override '{override}', use KEY=VALUE.")
+        config[key.strip()] = yaml.safe_load(value)
+
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"❌ Unknown config keys: {', '.join(sorted(unknown))}")
+    for key, choices in CHOICES.items():
+        if config[key] not in choices:
+            raise ValueError(f"❌ Invalid {key} '{config[key]}'. Use one of: {', '.join(choices)}")
+    if config["mode"] == "batches" and config["source"] != "postgres":
+        raise ValueError("❌ The batches mode resumes by post_id and needs source: postgres.")
+
+    for key in ("workers", "count_workers"):
+        if config[key] == "auto":
+            config[key] = available_cpus()
+        config[key] = max(1, int(config[key]))
+    if config["shards"] == "auto":
+        config["shards"] = int(os.getenv("SLURM_NTASKS", "1"))
+    config["shards"] = max(1, int(config["shards"]))
+    return config
+
+
+# **Function to Create a New Word2Vec Model from the Configuration**
+def new_model(config):
+    return Word2Vec(vector_size=config["vector_size"], window=config["window"], min_count=config["min_count"],
+                    workers=config["workers"], seed=config["seed"])
+
+
+# **Function to Create the Corpus of the Configured Source**
+def make_corpus(config):
+    if config["source"] == "files":
+        return load_sentences(config["sentences"])
+    return PostgresCorpus()
+
+
+# **Function to Return How Phrases are Added to the Sentences**
+def make_phraser(config):
+    """
+    :return: (function wrapping a re-iterable of sentences into the configured phrase corpus,
+              learned phrase detector or None)
+    """
+    if config["phrases"] == "ngrams":
+        return (lambda sentences: PhraseCorpus(sentences, max_n=config["phrase_length"])), None
+    if config["phrases"] == "learned":
+        phraser = load_or_learn_phraser(config["model_path"], make_corpus(config))
+        return (lambda sentences: PhrasedCorpus(sentences, phraser)), phraser
+    return (lambda sentences: sentences), None
@@ -0,0 +1,369 @@
+import os
+import json
+import logging
+import numpy as np
+from collections import Counter
+from parallel import ordered_pool_map
+from telemetry import Telemetry
+
+# Marker written next to the model after every epoch checkpoint, to resume from the last complete epoch
+STATE_SUFFIX = ".state.json"
+
+logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
+
+
+# ---------------------------- VOCABULARY ----------------------------
+
+def count_words(corpus):
+    """
+    Counts the words of a corpus (one streaming pass).
+    :return: (Counter of words, number of sentences, number of words)
+    """
+    counts = Counter()
+    sentences = words = 0
+    for sentence in corpus:
+        counts.update(sentence)
+        sentences += 1
+        words += len(sentence)
+    return counts, sentences, words
+
+
+def prune_counts(counts, max_vocab_size):
+    """
+    Keeps the `max_vocab_size` most frequent words (ties at the cut-off are dropped together),
+    so merging many shard counts stays within memory.
+    """
+    if not max_vocab_size or len(counts) <= max_vocab_size:
+        return counts
+    cutoff = counts.most_common(max_vocab_size)[-1][1]
+    return Counter({word: count for word, count in counts.items() if count > cutoff})
+
+
+def count_vocab(corpus, workers=1, max_vocab_size=None):
+    """
+    Single-scan vocabulary counting pass. With several workers the corpus is split
+    (corpus.split(), e.g. ShardedCorpus by shards or PostgresCorpus by post_id ranges),
+    every part is counted in its own process and the counts are merged.
+    :param corpus: Re-iterable of tokenized sentences
+    :param workers: Number of counting processes
+    :param max_vocab_size: Optional cap on the merged word counts
+    :return: (Counter of words, number of sentences, number of words)
+    """
+    parts = corpus.split(workers) if workers > 1 and hasattr(corpus, "split") else [corpus]
+    logging.info(f"🔎 Counting words in {len(parts)} part(s)...")
+
+    results = ordered_pool_map(count_words, parts, workers) if len(parts) > 1 else map(count_words, parts)
+
+    counts, sentences, words = Counter(), 0, 0
+    for part_counts, part_sentences, part_words in results:
+        counts.update(part_counts)
+        sentences += part_sentences
+        words += part_words
+        counts = prune_counts(counts, max_vocab_size)
+
+    logging.info(f"✅ Counted {len(counts)} distinct words, {words} words in {sentences} sentences.")
+    return counts, sentences, words
+
+
+def build_vocab(model, corpus, workers=1, max_vocab_size=None):
+    """Builds the model vocabulary once, from the (sharded) counting pass, instead of scanning in gensim."""
+    counts, sentences, words = count_vocab(corpus, workers, max_vocab_size)
+    model.build_vocab_from_freq(counts, corpus_count=sentences)
+    model.corpus_total_words = words  # Raw words per epoch, drives the learning-rate decay
+
+
+def prune_vocab(model, max_vocab_size=None, min_count=None, ngram_min_count=None):
+    """
+    Drops words from a trained model's vocabulary by their accumulated counts and compacts every per-word
+    array (vectors, counts and other vector attributes, syn1neg/syn1, lock factors) to the words kept,
+    so memory, snapshot size and most_similar() cost stay bounded under incremental training.
+    Words keep their relative order and vectors; the sampling tables are rebuilt.
+    :param max_vocab_size: Keep at most this many words, the most frequent ones
+    :param min_count: Drop words seen fewer times than this (re-evaluated on the counts so far)
+    :param ngram_min_count: Drop n-grams ("_" in the word) seen fewer times than this
+    :return: Number of words dropped
+    """
+    wv = model.wv
+    counts = wv.expandos["count"]
+    keep = np.ones(len(wv.index_to_key), dtype=bool)
+
+    if min_count:
+        keep &= counts >= min_count
+    if ngram_min_count:
+        is_ngram = np.fromiter(("_" in word for word in wv.index_to_key), dtype=bool, count=len(wv.index_to_key))
+        keep &= ~is_ngram | (counts >= ngram_min_count)
+    if max_vocab_size and keep.sum() > max_vocab_size:
+        candidates = np.flatnonzero(keep)
+        most_frequent = candidates[np.argsort(-counts[candidates], kind="stable")[:max_vocab_size]]
+        keep[:] = False
+        keep[most_frequent] = True
+
+    dropped = len(keep) - int(keep.sum())
+    if not dropped:
+        return 0
+
+    kept = np.flatnonzero(keep)
+    wv.index_to_key = [wv.index_to_key[i] for i in kept]
+    wv.key_to_index = {word: i for i, word in enumerate(wv.index_to_key)}
+    wv.vectors = wv.vectors[kept]
+    for attribute, values in wv.expandos.items():
+        wv.expandos[attribute] = values[kept]
+    if len(wv.vectors_lockf) == len(keep):
+        wv.vectors_lockf = wv.vectors_lockf[kept]
+    wv.norms = None
+
+    if model.negative:
+        model.syn1neg = model.syn1neg[kept]
+    if model.hs:
+        # Like gensim's own vocabulary updates: rebuild the Huffman tree, keep the first inner-node weights
+        model.syn1 = model.syn1[:len(kept)]
+        model.create_binary_tree()
+    if model.negative:
+        model.make_cum_table()
+
+    logging.info(f"✂️ Pruned {dropped} words, {len(kept)} left.")
+    return dropped
+
+
+# ---------------------------- TRAINING ----------------------------
+
+def read_state(model_path):
+    """:return: The checkpoint state of a streaming run ({"epoch": ..., "checkpoint": ...}), None if there is none"""
+    path = model_path + STATE_SUFFIX
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_state(model_path, state):
+    """Writes the checkpoint state atomically (temp file + rename)."""
+    path = model_path + STATE_SUFFIX
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def checkpoint_path(model_path, epoch):
+    """Returns the checkpoint file of an epoch: <model>_epoch<N>.model next to the model."""
+    base, extension = os.path.splitext(model_path)
+    return f"{base}_epoch{epoch}{extension or '.model'}"
+
+
+def save_checkpoint(model, model_path, state):
+    """
+    Saves the model as the checkpoint of state["epoch"], then points the state marker at it
+    and removes the previous checkpoint, so a crash always leaves one complete checkpoint.
+    """
+    previous = read_state(model_path)
+    state["checkpoint"] = checkpoint_path(model_path, state["epoch"])
+    model.save(state["checkpoint"])
+    write_state(model_path, state)
+    logging.info(f"💾 Checkpoint after epoch {state['epoch']}/{state['epochs']} saved to {state['checkpoint']}.")
+
+    if previous and previous["checkpoint"] != state["checkpoint"]:
+        remove_model_files(previous["checkpoint"])
+
+
+def check_learning_rates(alpha, min_alpha):
+    """
+    Checks the learning rates of the linear decay from alpha to min_alpha.
+    A min_alpha of 0 (or below) is clamped to gensim's default of 0.0001, kept below alpha.
+    :return: (alpha, min_alpha)
+    :raises ValueError: If alpha is not positive or min_alpha is not below alpha
+    """
+    if alpha <= 0:
+        raise ValueError(f"❌ The learning rate alpha must be positive, got {alpha}.")
+    if min_alpha <= 0:
+        min_alpha = min(0.0001, alpha / 2)
+        logging.warning(f"⚠️ min_alpha must be positive, using {min_alpha}.")
+    if min_alpha >= alpha:
+        raise ValueError(f"❌ min_alpha ({min_alpha}) must be lower than alpha ({alpha}).")
+    return alpha, min_alpha
+
+
+def remove_model_files(path):
+    """Removes a saved gensim model and its separately stored .npy arrays."""
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path)
+    for name in os.listdir(directory):
+        if name == prefix or (name.startswith(prefix + ".") and name.endswith(".npy")):
+            os.remove(os.path.join(directory, name))
+
+
+def train_streaming(model, corpus, model_path, epochs, count_workers=1, max_vocab_size=None, queue_factor=2,
+                    telemetry=None):
+    """
+    Streaming training: builds the vocabulary in one (sharded) counting pass, then trains `epochs`
+    passes over the re-iterable corpus, one model.train() call per epoch. The learning rate follows
+    one linear decay from alpha to min_alpha over all epochs, exactly like a single train(epochs=N).
+    The model is checkpointed after the vocabulary and after every epoch; an unfinished run resumes
+    from its last checkpoint without counting the vocabulary again.
+    :param model: New Word2Vec model, replaced by the checkpoint when resuming. If it already has a
+                  vocabulary, its corpus_count and corpus_total_words must describe `corpus`
+    :param corpus: Re-iterable of tokenized sentences (ShardedCorpus, PostgresCorpus, ...)
+    :param model_path: Final model path; the checkpoints and the state marker are stored next to it
+    :param epochs: Number of epochs
+    :param count_workers: Processes for the vocabulary counting pass
+    :param max_vocab_size: Optional cap on the counted words
+    :param queue_factor: Jobs queued per gensim worker thread, raise it if the workers starve
+    :param telemetry: Optional Telemetry, a record is emitted after every epoch
+    :return: The trained model
+    """
+    from gensim.models import Word2Vec
+
+    telemetry = telemetry or Telemetry(model_path, stdout=False)
+
+    state = read_state(model_path)
+    if state and state["epoch"] < state["epochs"]:
+        logging.info(f"🔄 Resuming after epoch {state['epoch']}/{state['epochs']} from {state['checkpoint']}...")
+        model = Word2Vec.load(state["checkpoint"])
+    else:
+        if not len(model.wv):  # A shared vocabulary (sharded training) is used as it is
+            with telemetry.stage("vocab"):
+                build_vocab(model, corpus, count_workers, max_vocab_size)
+        alpha, min_alpha = check_learning_rates(model.alpha, model.min_alpha)
+        state = {"epoch": 0, "epochs": epochs, "alpha": alpha, "min_alpha": min_alpha}
+        with telemetry.stage("checkpoint"):
+            save_checkpoint(model, model_path, state)
+
+    alpha, min_alpha, epochs = state["alpha"], state["min_alpha"], state["epochs"]
+    step = (alpha - min_alpha) / epochs
+
+    for epoch in range(state["epoch"], epochs):
+        logging.info(f"🚂 Epoch {epoch + 1}/{epochs}...")
+        with telemetry.stage("train"):
+            result = model.train(
+                corpus,
+                total_examples=model.corpus_count,
+                total_words=model.corpus_total_words,
+                epochs=1,
+                start_alpha=alpha - epoch * step,
+                end_alpha=alpha - (epoch + 1) * step,
+                queue_factor=queue_factor,
+            )
+        telemetry.count_training(result, rows=model.corpus_count)
+        state["epoch"] = epoch + 1
+        with telemetry.stage("checkpoint"):
+            save_checkpoint(model, model_path, state)
+        telemetry.emit("epoch", epoch=state["epoch"], epochs=epochs)
+
+    # Restore the configured rates, train() leaves the ones of the last epoch on the model
+    model.alpha, model.min_alpha = alpha, min_alpha
+    with telemetry.stage("save"):
+        model.save(model_path)
+
+    # The final model is saved, the last epoch checkpoint is not needed anymore
+    last_checkpoint = state["checkpoint"]
+    state["checkpoint"] = model_path
+    write_state(model_path, state)
+    if last_checkpoint != model_path:
+        remove_model_files(last_checkpoint)
+    telemetry.emit("done", epoch=epochs, epochs=epochs, vocab_size=len(model.wv))
+    logging.info(f"🎉 Training complete! Final model saved to {model_path}.")
+    return model
+
+
+# ---------------------------- SHARDED TRAINING ----------------------------
+
+def build_shared_vocab(model, corpus, vocab_path, count_workers=1, max_vocab_size=None):
+    """
+    Builds the vocabulary of the whole corpus once and saves the untrained model: every shard starts
+    from it, so all shards share the same words, indexes and (seeded) initial vectors.
+    """
+    build_vocab(model, corpus, count_workers, max_vocab_size)
+    model.save(vocab_path)
+    logging.info(f"💾 Shared vocabulary of {len(model.wv)} words saved to {vocab_path}.")
+    return model
+
+
+def shard_counts_path(shard_path):
+    """Returns where the per-word counts of a shard are stored, next to the shard model."""
+    return os.path.splitext(shard_path)[0] + ".counts.npy"
+
+
+def train_shard(vocab_path, corpus, shard_path, epochs, workers=None, queue_factor=2):
+    """
+    Trains one shard (one part of the corpus) from the shared vocabulary model, resuming by epoch,
+    and stores how often every vocabulary word occurs in the shard (the averaging weights).
+    Does nothing if the shard is already trained.
+    :return: Path of the trained shard model
+    """
+    from gensim.models import Word2Vec
+
+    state = read_state(shard_path)
+    if state and state["epoch"] >= state["epochs"] and os.path.exists(shard_path):
+        logging.info(f"✅ Shard {shard_path} is already trained.")
+        return shard_path
+
+    model = Word2Vec.load(vocab_path)
+    if workers:
+        model.workers = workers
+
+    if not (state and state["epoch"] < state["epochs"]):
+        counts, model.corpus_count, model.corpus_total_words = count_words(corpus)
+        weights = np.fromiter((counts.get(word, 0) for word in model.wv.index_to_key), dtype=np.int64,
+                              count=len(model.wv.index_to_key))
+        np.save(shard_counts_path(shard_path), weights)
+        logging.info(f"🔎 Shard {shard_path}: {model.corpus_count} sentences, {model.corpus_total_words} words.")
+
+    train_streaming(model, corpus, shard_path, epochs, queue_factor=queue_factor)
+    return shard_path
+
+
+def _train_shard_task(task):
+    return train_shard(*task)
+
+
+def train_shards_local(vocab_path, parts, shard_paths, epochs, workers=1, processes=2):
+    """
+    Local stand-in for a multi-task SLURM job: trains every shard in its own process.
+    :param parts: One corpus per shard
+    :param shard_paths: One model path per shard
+    :param workers: gensim threads per shard
+    :param processes: Shards trained at the same time
+    """
+    tasks = [(vocab_path, part, path, epochs, workers) for part, path in zip(parts, shard_paths)]
+    return list(ordered_pool_map(_train_shard_task, tasks, max(1, min(processes, len(tasks)))))
+
+
+def average_shards(vocab_path, shard_paths, model_path):
+    """
+    Merges the shard models into one: the vectors (and syn1neg) of every word are averaged over the shards,
+    weighted by how often the word occurs in each shard. Words no shard saw keep their initial vectors.
+    :return: The merged model, saved to `model_path`
+    """
+    from gensim.models import Word2Vec
+
+    model = Word2Vec.load(vocab_path)
+    vectors = np.zeros(model.wv.vectors.shape, dtype=np.float64)
+    syn1neg = np.zeros(model.syn1neg.shape, dtype=np.float64) if model.negative else None
+    total = np.zeros(len(model.wv), dtype=np.float64)
+    sentences = words = 0
+
+    for path in shard_paths:
+        shard = Word2Vec.load(path)
+        if shard.wv.index_to_key != model.wv.index_to_key:
+            raise ValueError(f"❌ Shard {path} was not trained from the vocabulary {vocab_path}.")
+        weights = np.load(shard_counts_path(path)).astype(np.float64)
+        vectors += weights[:, None] * shard.wv.vectors
+        if syn1neg is not None:
+            syn1neg += weights[:, None] * shard.syn1neg
+        total += weights
+        sentences += shard.corpus_count
+        words += shard.corpus_total_words
+        logging.info(f"➕ Added shard {path}.")
+
+    seen = total > 0
+    model.wv.vectors[seen] = vectors[seen] / total[seen, None]
+    if syn1neg is not None:
+        model.syn1neg[seen] = syn1neg[seen] / total[seen, None]
+    model.wv.norms = None
+    model.corpus_count, model.corpus_total_words = sentences, words
+
+    model.save(model_path)
+    logging.info(f"🎉 Averaged {len(shard_paths)} shards ({int(seen.sum())}/{len(seen)} words trained) into {model_path}.")
+    return model
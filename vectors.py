@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import copy
+import argparse
+import numpy as np
+from gensim.models import KeyedVectors, Word2Vec
+
+# Version snapshots only keep the word vectors (KeyedVectors), the full model is only needed to resume training
+VECTORS_EXTENSION = ".kv"
+MODEL_EXTENSION = ".model"
+SNAPSHOT_EXTENSIONS = (VECTORS_EXTENSION, MODEL_EXTENSION)  # In order of preference
+
+
+# ---------------------------- SAVE / LOAD ----------------------------
+
+def save_vectors(wv, path, float16=False):
+    """
+    Saves word vectors as a KeyedVectors snapshot: the vocabulary in `path` and the vectors
+    in a separate `path`.vectors.npy that load_vectors() memory-maps.
+    :param wv: KeyedVectors, e.g. model.wv
+    :param float16: Store the vectors as float16 (half the size, read back into memory as float32)
+    """
+    snapshot = copy.copy(wv)  # Shallow copy, the training model keeps its own vectors and norms
+    snapshot.norms = None  # Recomputed on the first similarity query
+    snapshot.__dict__.pop("vectors_lockf", None)  # Training-only state
+    if float16:
+        snapshot.vectors = wv.vectors.astype(np.float16)
+    snapshot.save(path, sep_limit=0)
+
+
+def load_vectors(path, mmap="r"):
+    """
+    Loads the word vectors of a snapshot: a KeyedVectors .kv file or a full Word2Vec .model.
+    float32 vectors are memory-mapped, float16 ones are converted to float32 in memory.
+    :return: KeyedVectors
+    """
+    if path.endswith(VECTORS_EXTENSION):
+        wv = KeyedVectors.load(path, mmap=mmap)
+    else:
+        wv = Word2Vec.load(path, mmap=mmap).wv
+    if wv.vectors.dtype == np.float16:
+        wv.vectors = wv.vectors.astype(np.float32)
+    return wv
+
+
+def snapshot_files(path):
+    """Returns the files of a saved snapshot or model: `path` and its separately stored .npy arrays."""
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path)
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if name == prefix or (name.startswith(prefix + ".") and name.endswith(".npy"))
+    ]
+
+
+def snapshot_size(path):
+    """Returns the size of a snapshot on disk, in bytes."""
+    return sum(os.path.getsize(name) for name in snapshot_files(path))
+
+
+def find_snapshot(base_path):
+    """
+    Returns the snapshot file for a path without extension, preferring the .kv vectors over a full .model.
+    :return: File path, or None if there is neither
+    """
+    for extension in SNAPSHOT_EXTENSIONS:
+        if os.path.exists(base_path + extension):
+            return base_path + extension
+    return None
+
+
+def list_snapshots(directory):
+    """
+    Lists the snapshots of a directory, once per name even if both a .kv and a .model exist.
+    :return: Dict of snapshot name (file name without extension) -> file path, the .kv preferred
+    """
+    snapshots = {}
+    for extension in reversed(SNAPSHOT_EXTENSIONS):  # .kv last, so it overrides the .model of the same name
+        for name in os.listdir(directory):
+            if name.endswith(extension):
+                snapshots[name[:-len(extension)]] = os.path.join(directory, name)
+    return snapshots
+
+
+# ---------------------------- BATCH SIMILARITY ----------------------------
+
+MAX_SCORES = 2 ** 26  # Scores (float32) computed at once by a query chunk: bounds the memory to 256 MB
+
+
+class SimilarityIndex:
+    """
+    Exact top-N similarity for many queries at once: the unit-normalized vocabulary matrix is computed once,
+    and every chunk of queries is answered with one matrix product and a per-row argpartition,
+    instead of one full scan of the vocabulary per most_similar() call.
+    Returns the same neighbours as wv.most_similar(positive=terms, topn=topn).
+    :param wv: KeyedVectors
+    """
+
+    def __init__(self, wv):
+        self.wv = wv
+        self.normed = wv.get_normed_vectors()
+
+    def query_vectors(self, queries):
+        """
+        :param queries: List of queries, each a key or a list of keys (all in the vocabulary)
+        :return: (unit-normalized mean vector of every query, indexes of every query's keys)
+        """
+        indexes = [[self.wv.get_index(key) for key in ([query] if isinstance(query, str) else query)]
+                   for query in queries]
+        vectors = np.stack([self.normed[keys].mean(axis=0) for keys in indexes]).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms), indexes
+
+    def most_similar(self, queries, topn=10):
+        """
+        :param queries: List of queries, each a key or a list of keys whose mean is queried (all in the vocabulary)
+        :param topn: Number of neighbours per query, the query's own keys excluded
+        :return: List of [(key, similarity), ...] per query, most similar first
+        """
+        if not queries:
+            return []
+        vectors, indexes = self.query_vectors(queries)
+        topn = min(topn, len(self.normed))
+        chunk_size = max(1, MAX_SCORES // len(self.normed))
+
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            scores = vectors[start:start + chunk_size] @ self.normed.T
+            for row, keys in enumerate(indexes[start:start + chunk_size]):
+                scores[row, keys] = -np.inf  # Like most_similar(), never return the query itself
+            results.extend(self.top(scores, topn))
+        return results
+
+    def top(self, scores, topn):
+        """:return: The `topn` best (key, score) of every row of `scores`, sorted"""
+        if topn < scores.shape[1]:
+            best = np.argpartition(scores, -topn, axis=1)[:, -topn:]  # Unordered top-N of every row
+        else:
+            best = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        results = []
+        for row, candidates in enumerate(best):
+            candidates = candidates[np.argsort(-scores[row, candidates])]
+            results.append([
+                (self.wv.index_to_key[i], float(scores[row, i])) for i in candidates if scores[row, i] > -np.inf
+            ])
+        return results
+
+
+# ---------------------------- CONVERSION ----------------------------
+
+# **Function to Convert Saved Word2Vec Models to KeyedVectors Snapshots**
+def convert_models(paths, float16=False, remove=False):
+    """
+    Writes a .kv snapshot next to every .model and reports the disk use and load time of both.
+    :param paths: .model files
+    :param remove: Delete the full model once its snapshot is written
+    :return: Number of models converted
+    """
+    converted = 0
+    for model_path in paths:
+        vectors_path = os.path.splitext(model_path)[0] + VECTORS_EXTENSION
+        try:
+            start = time.perf_counter()
+            wv = load_vectors(model_path)
+            model_time = time.perf_counter() - start
+            save_vectors(wv, vectors_path, float16=float16)
+
+            start = time.perf_counter()
+            load_vectors(vectors_path)
+            vectors_time = time.perf_counter() - start
+        except Exception as e:
+            print(f"❌ Error converting {model_path}: {e}", flush=True)
+            continue
+
+        model_size, vectors_size = snapshot_size(model_path), snapshot_size(vectors_path)
+        print(f"✅ {os.path.basename(model_path)} → {os.path.basename(vectors_path)}: "
+              f"{model_size / 2**20:,.1f} MB → {vectors_size / 2**20:,.1f} MB, "
+              f"load {model_time:.2f}s → {vectors_time:.2f}s", flush=True)
+        if remove:
+            for name in snapshot_files(model_path):
+                os.remove(name)
+        converted += 1
+    return converted
+
+
+# The main function
+def main():
+    parser = argparse.ArgumentParser(description="Convert saved Word2Vec models (e.g. ./versions) to KeyedVectors snapshots.")
+    parser.add_argument("path", type=str, help="A .model file or a directory of them")
+    parser.add_argument("--float16", action="store_true", help="Store the vectors as float16")
+    parser.add_argument("--remove", action="store_true", help="Delete every full model once its snapshot is written")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        paths = [os.path.join(args.path, name) for name in sorted(os.listdir(args.path)) if name.endswith(MODEL_EXTENSION)]
+    else:
+        paths = [args.path]
+    if not paths:
+        print(f"✅ No .model files in {args.path}.", flush=True)
+        return
+
+    if convert_models(paths, float16=args.float16, remove=args.remove) < len(paths):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()